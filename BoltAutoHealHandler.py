@@ -1,5 +1,6 @@
 import bolt as bolt3
 import time
+from BoltS3Metrics import BoltS3Metrics
 
 
 def lambda_handler(event, context):
@@ -10,6 +11,8 @@ def lambda_handler(event, context):
     lambda_handler accepts the following input parameters as part of the event:
     1) bucket - bucket name
     2) key - key name
+    3) metricsFormat - emit numeric metrics as CloudWatch EMF log lines (emf) or as an OpenMetrics payload
+       in the response (openmetrics) (optional)
 
     :param event: incoming event data
     :param context: runtime information
@@ -17,6 +20,13 @@ def lambda_handler(event, context):
     """
     bucket = event['bucket']
     key = event['key']
+    try:
+        metrics = BoltS3Metrics(event)
+    except ValueError as e:
+        return {
+            'errorMessage': str(e),
+            'errorCode': str(1)
+        }
 
     # Bolt Client.
     bolts3_client = bolt3.client('s3')
@@ -37,7 +47,8 @@ def lambda_handler(event, context):
             pass
 
     auto_heal_time = auto_heal_end_time - auto_heal_start_time
+    metrics.add('AutoHealTime', auto_heal_time, 'Seconds', 'bolt', 'auto_heal')
 
-    return {
+    return metrics.emit({
         'auto_heal_time': "{:.2f} secs".format(auto_heal_time)
-    }
+    })
@@ -0,0 +1,139 @@
+import json
+import math
+import re
+import time
+
+
+class BoltS3Metrics:
+    """
+    BoltS3Metrics collects numeric metrics, along with their dimensions (backend, operation, bucket, object size
+    class), from the handlers and emits them in a machine readable format:
+    EMF - CloudWatch Embedded Metric Format log lines, printed to the function's log
+    OPENMETRICS - OpenMetrics text payload, returned in the response as 'metrics'
+    """
+
+    # namespace of the metrics, if not passed in input.
+    NAMESPACE = 'BoltS3'
+
+    # dimension names, in the order they are emitted.
+    DIMENSIONS = ('Backend', 'Operation', 'Bucket', 'ObjectSizeClass')
+
+    # OpenMetrics name suffix of each unit.
+    UNIT_SUFFIXES = {'Seconds': 'seconds', 'Bytes': 'bytes', 'Bytes/Second': 'bytes_per_second',
+                     'Count/Second': 'per_second', 'Percent': 'percent'}
+
+    def __init__(self, event):
+        if 'metricsFormat' in event:
+            self._metrics_format = str(event['metricsFormat']).upper()
+            if self._metrics_format not in ('EMF', 'OPENMETRICS'):
+                raise ValueError("unsupported metricsFormat: {}".format(event['metricsFormat']))
+        else:
+            self._metrics_format = None
+        self._namespace = str(event.get('metricsNamespace', self.NAMESPACE))
+        self._bucket = str(event.get('bucket', ''))
+        # list of (name, value, unit, dimensions).
+        self._metrics = []
+
+    def add(self, name, value, unit, backend, operation, object_size_class='all'):
+        """
+        Records a metric.
+        :param name: metric name (CamelCase)
+        :param value: numeric value
+        :param unit: CloudWatch unit (Seconds, Bytes, Count, Count/Second, ...)
+        :param backend: backend (s3 / bolt)
+        :param operation: operation (get_object, put_object, ...)
+        :param object_size_class: size class of the objects involved
+        """
+        dimensions = (backend, operation, self._bucket, object_size_class)
+        self._metrics.append((name, float(value), unit, dimensions))
+
+    def emit(self, resp):
+        """
+        Emits the recorded metrics in the format passed in input (metricsFormat), if any.
+        EMF log lines are printed, whereas an OpenMetrics payload is added to the response.
+        :param resp: handler response
+        :return: handler response
+        """
+        if self._metrics_format == 'EMF':
+            for line in self.to_emf():
+                print(line)
+        elif self._metrics_format == 'OPENMETRICS':
+            resp['metrics'] = self.to_openmetrics()
+        return resp
+
+    def to_emf(self):
+        """
+        Renders the recorded metrics as CloudWatch Embedded Metric Format log lines, one per set of dimensions.
+        :return: list of EMF log lines
+        """
+        # group metrics by dimensions, keeping every value of metrics recorded more than once.
+        groups = {}
+        for name, value, unit, dimensions in self._metrics:
+            group = groups.setdefault(dimensions, {})
+            group.setdefault(name, (unit, []))[1].append(value)
+
+        timestamp = int(time.time() * 1000)
+        lines = []
+        for dimensions, group in groups.items():
+            doc = {
+                '_aws': {
+                    'Timestamp': timestamp,
+                    'CloudWatchMetrics': [{
+                        'Namespace': self._namespace,
+                        'Dimensions': [list(self.DIMENSIONS)],
+                        'Metrics': [{'Name': name, 'Unit': unit} for name, (unit, values) in group.items()]
+                    }]
+                }
+            }
+            doc.update(zip(self.DIMENSIONS, dimensions))
+            for name, (unit, values) in group.items():
+                doc[name] = values[0] if len(values) == 1 else values
+            lines.append(json.dumps(doc))
+        return lines
+
+    def to_openmetrics(self):
+        """
+        Renders the recorded metrics as an OpenMetrics text payload of gauges. A metric recorded more than once
+        with the same dimensions is rendered as a single sample, holding its last value.
+        :return: OpenMetrics text
+        """
+        families = {}
+        for name, value, unit, dimensions in self._metrics:
+            family = self._openmetrics_name(name, unit)
+            families.setdefault(family, (unit, {}))[1][dimensions] = value
+
+        lines = []
+        for family, (unit, samples) in families.items():
+            lines.append("# TYPE {} gauge".format(family))
+            if unit in ('Seconds', 'Bytes'):
+                lines.append("# UNIT {} {}".format(family, self.UNIT_SUFFIXES[unit]))
+            for dimensions, value in samples.items():
+                labels = ','.join('{}="{}"'.format(self._snake_case(dimension), self._escape(label))
+                                  for dimension, label in zip(self.DIMENSIONS, dimensions))
+                lines.append("{}{{{}}} {}".format(family, labels, self._format_value(value)))
+        lines.append("# EOF")
+        return '\n'.join(lines) + '\n'
+
+    def _openmetrics_name(self, name, unit):
+        suffix = self.UNIT_SUFFIXES.get(unit)
+        family = self._snake_case(self._namespace) + '_' + self._snake_case(name)
+        if suffix and not family.endswith('_' + suffix):
+            family += '_' + suffix
+        return family
+
+    @staticmethod
+    def _format_value(value):
+        if math.isnan(value):
+            return 'NaN'
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        return repr(value)
+
+    @staticmethod
+    def _snake_case(name):
+        name = re.sub(r'([a-z0-9])([A-Z])', r'\1_\2', name)
+        return re.sub(r'[^a-zA-Z0-9_]', '_', name).lower()
+
+    @staticmethod
+    def _escape(label):
+        return str(label).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
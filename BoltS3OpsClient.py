@@ -3,7 +3,10 @@ import gzip
 import boto3
 import bolt as bolt3
 from botocore.exceptions import ClientError
+from BoltS3Metrics import BoltS3Metrics
+from BoltS3RetryStats import BoltS3RetryStats
 import hashlib
+import time
 
 
 class BoltS3OpsClient:
@@ -14,6 +17,10 @@ class BoltS3OpsClient:
 
     def __init__(self):
         self._s3_client = None
+        self._retry_stats = None
+        self._metrics = None
+        self._backend = None
+        self._operation = None
 
     def process_event(self, event):
         """
@@ -23,44 +30,81 @@ class BoltS3OpsClient:
 
         request_type = str(event['requestType']).upper()
 
+        # numeric metrics, emitted in the format passed in input (metricsFormat), if any.
+        try:
+            self._metrics = BoltS3Metrics(event)
+        except ValueError as e:
+            return {
+                'errorMessage': str(e),
+                'errorCode': str(1)
+            }
+        self._operation = request_type.lower()
+
         # request is sent to S3 if 'sdkType' is not passed as a parameter in the event.
         if 'sdkType' in event:
             sdk_type = str(event['sdkType']).upper()
         else:
             sdk_type = 'S3'
+        self._backend = sdk_type.lower()
 
-        # create an S3/Bolt Client depending on the 'sdkType'
+        # create an S3/Bolt Client depending on the 'sdkType', using the retry mode and max. attempts
+        # if passed in input.
+        client_config = BoltS3RetryStats.client_config(event)
         if sdk_type == 'S3':
-            self._s3_client = boto3.client('s3')
+            self._s3_client = boto3.client('s3', config=client_config)
         elif sdk_type == 'BOLT':
-            self._s3_client = bolt3.client('s3')
+            self._s3_client = bolt3.client('s3', config=client_config)
 
         # Performs an S3 / Bolt operation based on the input 'requestType'
         try:
+            # record attempts and retries of the request.
+            self._retry_stats = BoltS3RetryStats(self._s3_client)
+            request_start_time = time.time()
             if request_type == "LIST_OBJECTS_V2":
-                return self._list_objects_v2(event['bucket'])
+                resp = self._list_objects_v2(event['bucket'])
             elif request_type == "GET_OBJECT":
-                return self._get_object(event['bucket'], event['key'])
+                resp = self._get_object(event['bucket'], event['key'])
             elif request_type == "HEAD_OBJECT":
-                return self._head_object(event['bucket'], event['key'])
+                resp = self._head_object(event['bucket'], event['key'])
             elif request_type == "LIST_BUCKETS":
-                return self._list_buckets()
+                resp = self._list_buckets()
             elif request_type == "HEAD_BUCKET":
-                return self._head_bucket(event['bucket'])
+                resp = self._head_bucket(event['bucket'])
             elif request_type == "PUT_OBJECT":
-                return self._put_object(event['bucket'], event['key'], event['value'])
+                resp = self._put_object(event['bucket'], event['key'], event['value'])
             elif request_type == "DELETE_OBJECT":
-                return self._delete_object(event['bucket'], event['key'])
+                resp = self._delete_object(event['bucket'], event['key'])
+            else:
+                raise ValueError("unsupported requestType: {}".format(event['requestType']))
+            request_end_time = time.time()
+            self._metrics.add('Latency', request_end_time - request_start_time, 'Seconds',
+                              self._backend, self._operation)
+            return self._with_request_stats(resp)
         except ClientError as e:
-            return {
+            self._retry_stats.record_error(e)
+            return self._with_request_stats({
                 'errorMessage': e.response['Error']['Message'],
                 'errorCode': e.response['Error']['Code']
-            }
+            })
         except Exception as e:
-            return {
+            if self._retry_stats is not None:
+                self._retry_stats.record_error(e)
+            return self._with_request_stats({
                 'errorMessage': str(e),
                 'errorCode': str(1)
-            }
+            })
+
+    def _with_request_stats(self, resp):
+        """
+        Adds the attempts, retries and failures of the request to the response, and emits metrics
+        in the format passed in input, if any.
+        :param resp: response
+        :return: response with request statistics
+        """
+        if self._retry_stats is not None:
+            resp['requestStats'] = self._retry_stats.stats()
+            self._retry_stats.add_metrics(self._metrics, self._backend, self._operation)
+        return self._metrics.emit(resp)
 
     def _list_objects_v2(self, bucket):
         """
@@ -23,6 +23,19 @@ def lambda_handler(event, context):
 
     4) key - key name
 
+    5) retryMode - retry mode of the client: legacy, standard or adaptive (optional)
+
+    6) maxAttempts - max. no of attempts per request, including the initial attempt (optional)
+
+    7) metricsFormat - emit numeric metrics (latency, attempts, retries), with backend, operation and bucket
+       dimensions, as CloudWatch EMF log lines (emf) or as an OpenMetrics payload in the response (openmetrics)
+       (optional)
+
+    8) metricsNamespace - namespace of the metrics (default BoltS3) (optional)
+
+    The response includes requestStats: the attempts made, retry reasons, time spent backing off between
+    attempts and errors of the request.
+
     Following are examples of events, for various requests, that can be used to invoke the handler function.
     a) Listing first 1000 objects from Bolt bucket:
         {"requestType": "list_objects_v2", "sdkType": "BOLT", "bucket": "<bucket>"}
@@ -45,6 +58,10 @@ def lambda_handler(event, context):
     g) Delete object from Bolt:
         {"requestType": "delete_object", "sdkType": "BOLT", "bucket": "<bucket>", "key": "<key>"}
 
+    h) Retrieve object (its MD5 Hash) from Bolt, using adaptive retries with up to 5 attempts:
+        {"requestType": "get_object", "sdkType": "BOLT", "bucket": "<bucket>", "key": "<key>",
+         "retryMode": "adaptive", "maxAttempts": 5}
+
     :param event: incoming event data
     :param context: runtime information
     :return: response from BoltS3OpsClient
@@ -1,14 +1,37 @@
 import boto3
 import bolt as bolt3
 from botocore.exceptions import ClientError
+from BoltS3Metrics import BoltS3Metrics
+from BoltS3RetryStats import BoltS3RetryStats
+import gzip
+import hashlib
+import os
+import queue
 import random
 import string
+import threading
 import time
 import math
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from datetime import timedelta
 from statistics import mean
 from statistics import median_low
 
 
+def _decompress(data):
+    """
+    Decompresses gzip encoded data. Defined at module level, so that it can be run in a process pool.
+    :param data: gzip encoded data
+    :return: decompressed size, time taken to decompress
+    """
+    decode_start_time = time.perf_counter()
+    decompressed = gzip.decompress(data)
+    decode_end_time = time.perf_counter()
+    return len(decompressed), decode_end_time - decode_start_time
+
+
 class BoltS3Perf:
     """
     BoltS3Perf processes AWS Lambda events that are received by the handler function
@@ -20,11 +43,49 @@ class BoltS3Perf:
     NUM_KEYS = 1000
     # length of object data
     OBJ_LENGTH = 100
+    # layout of generated key names: FLAT, HASHED, SHARDED or DATE
+    KEY_LAYOUT = 'FLAT'
+    # no of prefixes (shards) used by SHARDED and DATE key layouts
+    NUM_SHARDS = 16
+    # date (yyyy-mm-dd or yyyy-mm-ddThh) of the latest partition used by DATE key layout. The partitions
+    # are fixed, rather than derived from the current time, so that a later delete rebuilds the same key names.
+    PARTITION_DATE = '2021-01-01'
+    # shard counts used by PUT/DELETE scaling Perf
+    SHARD_COUNTS = (1, 2, 4, 8, 16)
+
+    # handling of the rest of the body by first byte (TTFB) Get Object Perf: DRAIN or CLOSE
+    TTFB_BODY_HANDLING = 'DRAIN'
+
+    # constants for mixed Workload Perf
+    # total no of requests to be sent to each of Bolt / S3
+    NUM_REQUESTS = 1000
+    # no of requests in flight at any time
+    CONCURRENCY = 10
+    # default operation mix (weights)
+    OP_WEIGHTS = {'GET_OBJECT': 80, 'HEAD_OBJECT': 15, 'PUT_OBJECT': 5}
+    # operations supported in a workload mix
+    WORKLOAD_OPS = ('GET_OBJECT', 'HEAD_OBJECT', 'PUT_OBJECT', 'LIST_OBJECTS_V2')
+    # prefix of key names uploaded by the workload, followed by a run id
+    WORKLOAD_PREFIX = 'bolt-s3-workload/'
+
+    # constants for Cold / Warm Get Object Perf
+    # no of times each key is read
+    NUM_READS = 3
+    # a repeat read faster than this fraction of the key's first read is counted as a cache hit
+    CACHE_HIT_RATIO = 0.5
+    # upper bounds (bytes) of object size classes
+    SIZE_CLASSES = ((1024, '<=1KB'), (64 * 1024, '<=64KB'), (1024 * 1024, '<=1MB'),
+                    (16 * 1024 * 1024, '<=16MB'))
+
+    # constants for pipelined Get Object Perf
+    # max. no of listed keys waiting to be fetched
+    QUEUE_SIZE = 1000
 
     def __init__(self):
-        # create S3 and Bolt Clients
-        self._s3_client = boto3.client('s3')
-        self._bolts3_client = bolt3.client('s3')
+        self._s3_client = None
+        self._bolts3_client = None
+        self._retry_stats = None
+        self._metrics = None
         self._keys = None
         self._request_type = None
 
@@ -42,6 +103,15 @@ class BoltS3Perf:
         else:
             self._request_type = 'ALL'
 
+        # numeric metrics, emitted in the format passed in input (metricsFormat), if any.
+        try:
+            self._metrics = BoltS3Metrics(event)
+        except ValueError as e:
+            return {
+                'errorMessage': str(e),
+                'errorCode': str(1)
+            }
+
         # update max. no of keys and object data length, if passed in input.
         if 'numKeys' in event:
             self.NUM_KEYS = int(event['numKeys'])
@@ -49,42 +119,88 @@ class BoltS3Perf:
                 self.NUM_KEYS = 1000
         if 'objLength' in event:
             self.OBJ_LENGTH = int(event['objLength'])
+        if 'keyLayout' in event:
+            self.KEY_LAYOUT = str(event['keyLayout']).upper()
+        if 'numShards' in event:
+            self.NUM_SHARDS = max(1, int(event['numShards']))
+        if 'partitionDate' in event:
+            self.PARTITION_DATE = str(event['partitionDate'])
+        if 'numRequests' in event:
+            self.NUM_REQUESTS = int(event['numRequests'])
+        if 'concurrency' in event:
+            self.CONCURRENCY = max(1, int(event['concurrency']))
+        if 'ttfbBodyHandling' in event:
+            self.TTFB_BODY_HANDLING = str(event['ttfbBodyHandling']).upper()
 
-        # if keys not passed as in input:
-        # if GET_OBJECT or GET_OBJECT_PASSTHROUGH, list objects (up to NUM_KEYS) to get key names
-        # otherwise generate key names.
-        if 'keys' in event:
-            self._keys = event['keys']
-        elif self._request_type == "GET_OBJECT" or self._request_type == "GET_OBJECT_PASSTHROUGH" or\
-                self._request_type == "GET_OBJECT_TTFB" or self._request_type == "GET_OBJECT_PASSTHROUGH_TTFB":
-            self._keys = self._list_objects_v2(event['bucket'])
-        else:
-            self._keys = self._generate_key_names(self.NUM_KEYS)
+        # create S3 and Bolt Clients, using the retry mode and max. attempts if passed in input.
+        # The connection pool is sized so that each of the CONCURRENCY requests in flight gets its own
+        # connection, rather than opening (and discarding) a new connection whenever the pool is exhausted.
+        # Pipelined Get Object Perf lists the bucket while CONCURRENCY workers get objects, which needs one more.
+        max_pool_connections = self.CONCURRENCY
+        if self._request_type == "GET_OBJECT_PIPELINE":
+            max_pool_connections += 1
+        client_config = BoltS3RetryStats.client_config(event, max_pool_connections=max_pool_connections)
+        self._s3_client = boto3.client('s3', config=client_config)
+        self._bolts3_client = bolt3.client('s3', config=client_config)
+
+        # record attempts, retries and failures of requests sent by the perf tests.
+        self._retry_stats = {
+            self._s3_client: BoltS3RetryStats(self._s3_client),
+            self._bolts3_client: BoltS3RetryStats(self._bolts3_client)
+        }
 
         # Perform Perf tests based on input 'requestType'
         try:
+            # if keys not passed as in input:
+            # if GET_OBJECT or GET_OBJECT_PASSTHROUGH, list objects (up to NUM_KEYS) to get key names
+            # otherwise generate key names.
+            if 'keys' in event:
+                self._keys = event['keys']
+            elif self._request_type in ("GET_OBJECT", "GET_OBJECT_PASSTHROUGH", "GET_OBJECT_TTFB",
+                                        "GET_OBJECT_PASSTHROUGH_TTFB", "GET_OBJECT_COLD_WARM", "GET_OBJECT_GZIP",
+                                        "WORKLOAD"):
+                self._keys = self._list_objects_v2(event['bucket'])
+            elif self._request_type == "GET_OBJECT_PIPELINE":
+                # keys are listed while objects are being fetched.
+                self._keys = None
+            else:
+                self._keys = self._generate_key_names(self.NUM_KEYS)
+
             if self._request_type == "PUT_OBJECT":
-                return self._put_object_perf(event['bucket'])
+                perf_stats = self._put_object_perf(event['bucket'])
             elif self._request_type == "GET_OBJECT" or self._request_type == "GET_OBJECT_TTFB":
-                return self._get_object_perf(event['bucket'])
+                perf_stats = self._get_object_perf(event['bucket'])
             elif self._request_type == "GET_OBJECT_PASSTHROUGH" or self._request_type == "GET_OBJECT_PASSTHROUGH_TTFB":
-                return self._get_object_passthrough_perf(event['bucket'])
+                perf_stats = self._get_object_passthrough_perf(event['bucket'])
+            elif self._request_type == "GET_OBJECT_COLD_WARM":
+                perf_stats = self._get_object_cold_warm_perf(event['bucket'], event)
+            elif self._request_type == "GET_OBJECT_GZIP":
+                perf_stats = self._get_object_gzip_perf(event['bucket'], event)
+            elif self._request_type == "GET_OBJECT_PIPELINE":
+                perf_stats = self._get_object_pipeline_perf(event['bucket'], event)
             elif self._request_type == "DELETE_OBJECT":
-                return self._delete_object_perf(event['bucket'])
+                perf_stats = self._delete_object_perf(event['bucket'])
+            elif self._request_type == "PUT_OBJECT_SCALING":
+                perf_stats = self._put_object_scaling_perf(event['bucket'], event)
             elif self._request_type == "LIST_OBJECTS_V2":
-                return self._list_objects_v2_perf(event['bucket'])
+                perf_stats = self._list_objects_v2_perf(event['bucket'])
+            elif self._request_type == "WORKLOAD":
+                perf_stats = self._workload_perf(event['bucket'], event)
             elif self._request_type == "ALL":
-                return self._all_perf(event['bucket'])
+                perf_stats = self._all_perf(event['bucket'])
+            else:
+                raise ValueError("unsupported requestType: {}".format(event['requestType']))
+            return self._metrics.emit(self._merge_perf_stats(perf_stats, self._request_stats()))
         except ClientError as e:
-            return {
+            return self._metrics.emit(self._merge_perf_stats({
                 'errorMessage': e.response['Error']['Message'],
                 'errorCode': e.response['Error']['Code']
-            }
+            }, self._request_stats()))
         except Exception as e:
-            return {
+            return self._metrics.emit(self._merge_perf_stats({
                 'errorMessage': str(e),
                 'errorCode': str(1)
-            }
+            }, self._request_stats()))
 
     def _put_object_perf(self, bucket):
         """
@@ -101,26 +217,34 @@ class BoltS3Perf:
             value_bytes = value.encode()
 
             # Upload object to S3.
-            put_obj_start_time = time.time()
-            self._s3_client.put_object(Bucket=bucket, Key=key, Body=value_bytes)
-            put_obj_end_time = time.time()
-            # calc latency
-            put_obj_time = put_obj_end_time - put_obj_start_time
-            s3_put_obj_times.append(put_obj_time)
+            try:
+                put_obj_start_time = time.time()
+                self._s3_client.put_object(Bucket=bucket, Key=key, Body=value_bytes)
+                put_obj_end_time = time.time()
+                # calc latency
+                put_obj_time = put_obj_end_time - put_obj_start_time
+                s3_put_obj_times.append(put_obj_time)
+            except Exception as e:
+                self._record_error(self._s3_client, e)
 
             # Upload object to Bolt.
-            put_obj_start_time = time.time()
-            self._bolts3_client.put_object(Bucket=bucket, Key=key, Body=value_bytes)
-            put_obj_end_time = time.time()
-            # calc latency
-            put_obj_time = put_obj_end_time - put_obj_start_time
-            bolt_put_obj_times.append(put_obj_time)
+            try:
+                put_obj_start_time = time.time()
+                self._bolts3_client.put_object(Bucket=bucket, Key=key, Body=value_bytes)
+                put_obj_end_time = time.time()
+                # calc latency
+                put_obj_time = put_obj_end_time - put_obj_start_time
+                bolt_put_obj_times.append(put_obj_time)
+            except Exception as e:
+                self._record_error(self._bolts3_client, e)
 
         # calc s3 perf stats
-        s3_put_obj_perf_stats = self._compute_perf_stats(s3_put_obj_times)
+        s3_put_obj_perf_stats = self._compute_perf_stats(s3_put_obj_times, backend='s3', operation='put_object',
+                                                         size_class=self._size_class(self.OBJ_LENGTH))
 
         # calc bolt perf stats
-        bolt_put_obj_perf_stats = self._compute_perf_stats(bolt_put_obj_times)
+        bolt_put_obj_perf_stats = self._compute_perf_stats(bolt_put_obj_times, backend='bolt', operation='put_object',
+                                                           size_class=self._size_class(self.OBJ_LENGTH))
 
         return {
             'object_size': "{:d} bytes".format(self.OBJ_LENGTH),
@@ -130,156 +254,547 @@ class BoltS3Perf:
 
     def _get_object_perf(self, bucket):
         """
-        Measures the Get Object performance (latency, throughput) of Bolt / S3.
+        Measures the Get Object performance (latency, throughput) of Bolt / S3, recording both time to first byte
+        and time to last byte of each request.
         :param bucket: bucket name
         :return: Get Object performance statistics
         """
+        ttfb_only = self._request_type == "GET_OBJECT_TTFB"
+
+        # Get Objects from S3.
+        s3_get_obj_perf_stats = self._measure_get_object(self._s3_client, bucket, 's3', 'get_obj', ttfb_only)
+
+        # Get Objects from Bolt.
+        bolt_get_obj_perf_stats = self._measure_get_object(self._bolts3_client, bucket, 'bolt', 'get_obj',
+                                                           ttfb_only)
+
+        get_obj_perf_stats = self._merge_perf_stats(s3_get_obj_perf_stats, bolt_get_obj_perf_stats)
+        if ttfb_only:
+            get_obj_perf_stats['ttfb_body_handling'] = self.TTFB_BODY_HANDLING.lower()
+        return get_obj_perf_stats
+
+    def _get_object_passthrough_perf(self, bucket):
+        """
+        Measures the Get Object passthrough performance (latency, throughput) of Bolt / S3, recording both
+        time to first byte and time to last byte of each request.
+        :param bucket: name of unmonitored bucket
+        :return: Get Object passthrough performance statistics
+        """
+        ttfb_only = self._request_type == "GET_OBJECT_PASSTHROUGH_TTFB"
+
+        # Get Objects via passthrough from Bolt.
+        get_obj_pt_perf_stats = self._measure_get_object(self._bolts3_client, bucket, 'bolt', 'get_obj_pt',
+                                                         ttfb_only)
+        if ttfb_only:
+            get_obj_pt_perf_stats['ttfb_body_handling'] = self.TTFB_BODY_HANDLING.lower()
+        return get_obj_pt_perf_stats
+
+    def _measure_get_object(self, client, bucket, client_name, stat_name, ttfb_only):
+        """
+        Gets each of the keys from Bolt / S3 and computes time to first byte, time to last byte and
+        object size statistics.
+        :param client: Bolt / S3 client
+        :param bucket: bucket name
+        :param client_name: name of the client (s3 / bolt) used in statistic names
+        :param stat_name: name of the operation used in statistic names
+        :param ttfb_only: whether only the time to first byte is being measured
+        :return: Get Object performance statistics
+        """
+        if self.TTFB_BODY_HANDLING not in ('DRAIN', 'CLOSE'):
+            raise ValueError("unsupported ttfbBodyHandling: {}".format(self.TTFB_BODY_HANDLING))
 
         # list of latencies.
-        s3_get_obj_times = []
-        bolt_get_obj_times = []
+        ttfb_times = []
+        ttlb_times = []
 
         # list of object sizes.
-        s3_obj_sizes = []
-        bolt_obj_sizes = []
+        obj_sizes = []
 
         # object counts (compressed, uncompressed).
-        s3_cmp_obj_count = 0
-        s3_uncmp_obj_count = 0
-        bolt_cmp_obj_count = 0
-        bolt_uncmp_obj_count = 0
+        cmp_obj_count = 0
+        uncmp_obj_count = 0
 
-        # Get Objects from S3.
         for key in self._keys:
-            get_obj_start_time = time.time()
-            s3_resp = self._s3_client.get_object(Bucket=bucket, Key=key)
-            # If getting first byte object latency, read at most 1 byte
-            # otherwise read the entire body.
-            if self._request_type == "GET_OBJECT_TTFB":
-                # read only first byte from StreamingBody.
-                s3_resp['Body'].read(amt=1)
-            else:
-                # read all the data from StreamingBody.
-                for chunk in s3_resp['Body'].iter_chunks():
-                    pass
-            get_obj_end_time = time.time()
-            # calc latency
-            get_obj_time = get_obj_end_time - get_obj_start_time
-            s3_get_obj_times.append(get_obj_time)
+            try:
+                resp, ttfb_time, ttlb_time, _ = self._get_object_timed(client, bucket, key, ttfb_only=ttfb_only)
+            except Exception as e:
+                self._record_error(client, e)
+                continue
+            ttfb_times.append(ttfb_time)
+            if ttlb_time is not None:
+                ttlb_times.append(ttlb_time)
             # count object
-            if ('ContentEncoding' in s3_resp and s3_resp['ContentEncoding'] == 'gzip') or str(key).endswith('.gz'):
-                s3_cmp_obj_count += 1
+            if ('ContentEncoding' in resp and resp['ContentEncoding'] == 'gzip') or str(key).endswith('.gz'):
+                cmp_obj_count += 1
             else:
-                s3_uncmp_obj_count += 1
+                uncmp_obj_count += 1
             # get object size.
-            if 'ContentLength' in s3_resp:
-                s3_obj_sizes.append(s3_resp['ContentLength'])
+            if 'ContentLength' in resp:
+                obj_sizes.append(resp['ContentLength'])
 
-        # Get Objects from Bolt.
-        for key in self._keys:
-            get_obj_start_time = time.time()
-            bolt_resp = self._bolts3_client.get_object(Bucket=bucket, Key=key)
-            # If getting first byte object latency, read at most 1 byte
-            # otherwise read the entire body.
-            if self._request_type == "GET_OBJECT_TTFB":
-                # read only first byte from StreamingBody.
-                bolt_resp['Body'].read(amt=1)
-            else:
-                # read all the data from StreamingBody.
-                for chunk in bolt_resp['Body'].iter_chunks():
-                    pass
-            get_obj_end_time = time.time()
-            # calc latency
-            get_obj_time = get_obj_end_time - get_obj_start_time
-            bolt_get_obj_times.append(get_obj_time)
-            # count object
-            if ('ContentEncoding' in bolt_resp and bolt_resp['ContentEncoding'] == 'gzip') or str(key).endswith('.gz'):
-                bolt_cmp_obj_count += 1
-            else:
-                bolt_uncmp_obj_count += 1
-            # get object size.
-            if 'ContentLength' in bolt_resp:
-                bolt_obj_sizes.append(bolt_resp['ContentLength'])
+        operation = 'get_object_passthrough' if stat_name == 'get_obj_pt' else 'get_object'
+        get_obj_perf_stats = {}
+        # time to last byte is unavailable when bodies are closed after the first byte.
+        if not ttfb_only or self.TTFB_BODY_HANDLING == 'DRAIN':
+            get_obj_perf_stats[client_name + '_' + stat_name + '_perf_stats'] = \
+                self._compute_perf_stats(ttlb_times, obj_sizes=list(obj_sizes),
+                                         backend=client_name, operation=operation)
+        get_obj_perf_stats[client_name + '_' + stat_name + '_ttfb_perf_stats'] = \
+            self._compute_perf_stats(ttfb_times, obj_sizes=obj_sizes,
+                                     backend=client_name, operation=operation + '_ttfb')
+        get_obj_perf_stats[client_name + '_object_count (compressed)'] = cmp_obj_count
+        get_obj_perf_stats[client_name + '_object_count (uncompressed)'] = uncmp_obj_count
+        return get_obj_perf_stats
 
-        # calc s3 perf stats
-        s3_get_obj_perf_stats = self._compute_perf_stats(s3_get_obj_times, obj_sizes=s3_obj_sizes)
+    def _get_object_timed(self, client, bucket, key, ttfb_only=False, keep_body=False):
+        """
+        Gets an object from Bolt / S3, measuring both the time to first byte and the time to last byte of
+        the same request. If only the time to first byte is being measured, the rest of the body is handled
+        as per TTFB_BODY_HANDLING: DRAIN reads it, so that the connection is returned to the pool, whereas
+        CLOSE closes the body, which discards the connection and leaves the time to last byte unmeasured.
+        :param client: Bolt / S3 client
+        :param bucket: bucket name
+        :param key: key name
+        :param ttfb_only: whether only the time to first byte is being measured
+        :param keep_body: whether to return the object data
+        :return: response, time to first byte, time to last byte (or None), object data (or None)
+        """
+        get_obj_start_time = time.time()
+        resp = client.get_object(Bucket=bucket, Key=key)
+        # read the first byte from StreamingBody.
+        first_byte = resp['Body'].read(amt=1)
+        ttfb_time = time.time() - get_obj_start_time
 
-        # calc bolt perf stats
-        bolt_get_obj_perf_stats = self._compute_perf_stats(bolt_get_obj_times, obj_sizes=bolt_obj_sizes)
+        if ttfb_only and self.TTFB_BODY_HANDLING == 'CLOSE':
+            resp['Body'].close()
+            return resp, ttfb_time, None, None
 
-        # assign perf stats name.
-        if self._request_type == "GET_OBJECT_TTFB":
-            s3_get_obj_stat_name = 's3_get_obj_ttfb_perf_stats'
-            bolt_get_obj_stat_name = 'bolt_get_obj_ttfb_perf_stats'
+        # read the rest of the data from StreamingBody.
+        data = None
+        if keep_body:
+            data = first_byte + resp['Body'].read()
         else:
-            s3_get_obj_stat_name = 's3_get_obj_perf_stats'
-            bolt_get_obj_stat_name = 'bolt_get_obj_perf_stats'
+            for chunk in resp['Body'].iter_chunks():
+                pass
+        ttlb_time = time.time() - get_obj_start_time
+        return resp, ttfb_time, ttlb_time, data
+
+    def _get_object_cold_warm_perf(self, bucket, event):
+        """
+        Measures the Get Object performance (latency, throughput) of Bolt / S3 for first (cold) reads
+        and repeat (warm) reads of the same keys.
+        :param bucket: bucket name
+        :param event: incoming event data (numReads, readGap, cacheHitRatio)
+        :return: Get Object cold / warm performance statistics
+        """
+        num_reads = max(2, int(event.get('numReads', self.NUM_READS)))
+        cache_hit_ratio = float(event.get('cacheHitRatio', self.CACHE_HIT_RATIO))
+        # gap (secs) before each repeat round of reads, either a single value or one value per round.
+        read_gap = event.get('readGap', 0)
+        if isinstance(read_gap, list):
+            read_gaps = [float(gap) for gap in read_gap]
+            if len(read_gaps) != num_reads - 1:
+                raise ValueError("readGap must contain {:d} values".format(num_reads - 1))
+        else:
+            read_gaps = [float(read_gap)] * (num_reads - 1)
+
+        s3_cold_warm_perf_stats = self._measure_cold_warm(self._s3_client, bucket, read_gaps, cache_hit_ratio)
+        bolt_cold_warm_perf_stats = self._measure_cold_warm(self._bolts3_client, bucket, read_gaps, cache_hit_ratio)
 
         return {
-            s3_get_obj_stat_name: s3_get_obj_perf_stats,
-            's3_object_count (compressed)': s3_cmp_obj_count,
-            's3_object_count (uncompressed)': s3_uncmp_obj_count,
-            bolt_get_obj_stat_name: bolt_get_obj_perf_stats,
-            'bolt_object_count (compressed)': bolt_cmp_obj_count,
-            'bolt_object_count (uncompressed)': bolt_uncmp_obj_count
+            'num_reads': num_reads,
+            'read_gaps': ["{:.2f} secs".format(gap) for gap in read_gaps],
+            's3_get_obj_cold_warm_perf_stats': s3_cold_warm_perf_stats,
+            'bolt_get_obj_cold_warm_perf_stats': bolt_cold_warm_perf_stats
         }
 
-    def _get_object_passthrough_perf(self, bucket):
+    def _measure_cold_warm(self, client, bucket, read_gaps, cache_hit_ratio):
         """
-        Measures the Get Object passthrough performance (latency, throughput) of Bolt / S3.
-        :param bucket: name of unmonitored bucket
-        :return: Get Object passthrough performance statistics
+        Reads every key once per round, sleeping for the given gap before each repeat round, and computes
+        first read / repeat read statistics, estimated cache hit rate and warm-up curve per object size class.
+        :param client: Bolt / S3 client
+        :param bucket: bucket name
+        :param read_gaps: gap (secs) before each repeat round
+        :param cache_hit_ratio: a repeat read faster than this fraction of the first read is a cache hit
+        :return: cold / warm performance statistics
         """
+        # latencies (time to last byte, time to first byte) of each key, one per round.
+        key_read_times = [[] for _ in self._keys]
+        key_read_ttfbs = [[] for _ in self._keys]
+        key_sizes = [0] * len(self._keys)
 
-        # list of latencies
-        bolt_get_obj_times = []
+        for round_index in range(len(read_gaps) + 1):
+            if round_index > 0 and read_gaps[round_index - 1] > 0:
+                time.sleep(read_gaps[round_index - 1])
+            for key_index, key in enumerate(self._keys):
+                try:
+                    resp, ttfb_time, ttlb_time, _ = self._get_object_timed(client, bucket, key)
+                except Exception as e:
+                    self._record_error(client, e)
+                    key_read_times[key_index].append(None)
+                    key_read_ttfbs[key_index].append(None)
+                    continue
+                key_read_times[key_index].append(ttlb_time)
+                key_read_ttfbs[key_index].append(ttfb_time)
+                key_sizes[key_index] = resp.get('ContentLength', 0)
 
-        # list of object sizes
-        bolt_obj_sizes = []
+        # group keys by object size class, leaving out keys with failed reads.
+        key_indices = [key_index for key_index, read_times in enumerate(key_read_times) if None not in read_times]
+        if not key_indices:
+            # no keys could be read successfully in every round.
+            return {
+                'key_count': 0,
+                'object_size_classes': {}
+            }
+        size_class_keys = {}
+        for key_index in key_indices:
+            size_class_keys.setdefault(self._size_class(key_sizes[key_index]), []).append(key_index)
 
-        # object counts (compressed, uncompressed).
-        bolt_cmp_obj_count = 0
-        bolt_uncmp_obj_count = 0
+        backend = self._backend(client)
+        cold_warm_perf_stats = self._compute_cold_warm_stats(key_read_times, key_read_ttfbs, key_sizes,
+                                                             key_indices, cache_hit_ratio, backend, 'all')
+        cold_warm_perf_stats['object_size_classes'] = {
+            size_class: self._compute_cold_warm_stats(key_read_times, key_read_ttfbs, key_sizes, key_indices,
+                                                      cache_hit_ratio, backend, size_class)
+            for size_class, key_indices in size_class_keys.items()
+        }
+        return cold_warm_perf_stats
 
-        # Get Objects via passthrough from Bolt.
+    def _compute_cold_warm_stats(self, key_read_times, key_read_ttfbs, key_sizes, key_indices, cache_hit_ratio,
+                                 backend, size_class):
+        """
+        Compute first read / repeat read statistics for the given keys.
+        :param key_read_times: latencies (time to last byte) of each key, one per round
+        :param key_read_ttfbs: time to first byte of each key, one per round
+        :param key_sizes: object size of each key
+        :param key_indices: indices of keys to be included
+        :param cache_hit_ratio: a repeat read faster than this fraction of the first read is a cache hit
+        :param backend: backend (s3 / bolt) the keys were read from
+        :param size_class: size class of the keys
+        :return: cold / warm performance statistics
+        """
+        first_read_times = []
+        repeat_read_times = []
+        first_read_ttfbs = []
+        repeat_read_ttfbs = []
+        obj_sizes = []
+        cache_hits = 0
+        for key_index in key_indices:
+            read_times = key_read_times[key_index]
+            first_read_times.append(read_times[0])
+            repeat_read_times.extend(read_times[1:])
+            first_read_ttfbs.append(key_read_ttfbs[key_index][0])
+            repeat_read_ttfbs.extend(key_read_ttfbs[key_index][1:])
+            obj_sizes.append(key_sizes[key_index])
+            cache_hits += sum(1 for read_time in read_times[1:] if read_time <= cache_hit_ratio * read_times[0])
+
+        # average latency of each round of reads.
+        warm_up = [
+            "{:.2f} secs".format(mean(key_read_times[key_index][round_index] for key_index in key_indices))
+            for round_index in range(len(key_read_times[key_indices[0]]))
+        ]
+
+        cache_hit_rate = 100.0 * cache_hits / len(repeat_read_times)
+        self._metrics.add('CacheHitRate', cache_hit_rate, 'Percent', backend, 'get_object_repeat_read', size_class)
+
+        return {
+            'key_count': len(first_read_times),
+            'first_read': self._compute_perf_stats(first_read_times, obj_sizes=obj_sizes, backend=backend,
+                                                   operation='get_object_first_read', size_class=size_class),
+            'first_read_ttfb': self._compute_perf_stats(first_read_ttfbs, backend=backend,
+                                                        operation='get_object_first_read_ttfb',
+                                                        size_class=size_class),
+            'repeat_read': self._compute_perf_stats(repeat_read_times, backend=backend,
+                                                    operation='get_object_repeat_read', size_class=size_class),
+            'repeat_read_ttfb': self._compute_perf_stats(repeat_read_ttfbs, backend=backend,
+                                                         operation='get_object_repeat_read_ttfb',
+                                                         size_class=size_class),
+            'cache_hit_rate (estimated)': "{:.2f} %".format(cache_hit_rate),
+            'warm_up': warm_up
+        }
+
+    def _size_class(self, size):
+        """
+        Returns the size class of an object.
+        :param size: object size in bytes
+        :return: size class name
+        """
+        for upper_bound, size_class in self.SIZE_CLASSES:
+            if size <= upper_bound:
+                return size_class
+        return '>' + self.SIZE_CLASSES[-1][1][2:]
+
+    def _get_object_gzip_perf(self, bucket, event):
+        """
+        Measures the Get Object performance of gzip encoded objects in Bolt / S3, timing the fetch (network)
+        and the decompression (CPU) of each object separately.
+        :param bucket: bucket name
+        :param event: incoming event data (decodeWorkers)
+        :return: Get Object gzip performance statistics
+        """
+        decode_workers = int(event.get('decodeWorkers', os.cpu_count() or 1))
+
+        # decompress objects in a process pool, so that decompression is not serialized behind the GIL.
+        # Process pools are unavailable in environments without shared memory (e.g AWS Lambda), in which
+        # case fall back to a thread pool (zlib releases the GIL while decompressing).
+        try:
+            decode_executor = ProcessPoolExecutor(max_workers=decode_workers)
+            decode_executor_type = 'process'
+        except (OSError, NotImplementedError):
+            decode_executor = ThreadPoolExecutor(max_workers=decode_workers)
+            decode_executor_type = 'thread'
+
+        with decode_executor:
+            s3_gzip_perf_stats = self._measure_gzip(self._s3_client, bucket, decode_executor)
+            bolt_gzip_perf_stats = self._measure_gzip(self._bolts3_client, bucket, decode_executor)
+
+        return {
+            'decode_executor': "{} pool ({:d} workers)".format(decode_executor_type, decode_workers),
+            's3_get_obj_gzip_perf_stats': s3_gzip_perf_stats,
+            'bolt_get_obj_gzip_perf_stats': bolt_gzip_perf_stats
+        }
+
+    def _measure_gzip(self, client, bucket, decode_executor):
+        """
+        Fetches gzip encoded objects from Bolt / S3 and decompresses them in the given executor,
+        while subsequent objects are being fetched.
+        :param client: Bolt / S3 client
+        :param bucket: bucket name
+        :param decode_executor: executor used to decompress objects
+        :return: fetch, decode and end-to-end performance statistics
+        """
+        # find gzip encoded objects up front, so that other objects are left out of the end-to-end time.
+        gzip_keys = []
         for key in self._keys:
-            get_obj_start_time = time.time()
-            bolt_resp = self._bolts3_client.get_object(Bucket=bucket, Key=key)
-            # If getting first byte object latency, read at most 1 byte
-            # otherwise read the entire body.
-            if self._request_type == "GET_OBJECT_PASSTHROUGH_TTFB":
-                # read only first byte from StreamingBody.
-                bolt_resp['Body'].read(amt=1)
-            else:
-                # read all the data from StreamingBody.
-                for chunk in bolt_resp['Body'].iter_chunks():
-                    pass
-            get_obj_end_time = time.time()
-            # calc latency
-            get_obj_time = get_obj_end_time - get_obj_start_time
-            bolt_get_obj_times.append(get_obj_time)
-            # count object
-            if ('ContentEncoding' in bolt_resp and bolt_resp['ContentEncoding'] == 'gzip') or str(key).endswith('.gz'):
-                bolt_cmp_obj_count += 1
-            else:
-                bolt_uncmp_obj_count += 1
-            # get object size.
-            if 'ContentLength' in bolt_resp:
-                bolt_obj_sizes.append(bolt_resp['ContentLength'])
+            if str(key).endswith('.gz'):
+                gzip_keys.append(key)
+                continue
+            try:
+                resp = client.head_object(Bucket=bucket, Key=key)
+            except Exception as e:
+                self._record_error(client, e)
+                continue
+            if resp.get('ContentEncoding') == 'gzip':
+                gzip_keys.append(key)
 
-        # calc bolt perf stats
-        bolt_get_obj_pt_perf_stats = self._compute_perf_stats(bolt_get_obj_times, obj_sizes=bolt_obj_sizes)
+        fetch_times = []
+        fetch_ttfbs = []
+        compressed_sizes = []
+        decode_futures = []
 
-        # assign perf stats name.
-        if self._request_type == "GET_OBJECT_PASSTHROUGH_TTFB":
-            bolt_get_obj_pt_stat_name = 'bolt_get_obj_pt_ttfb_perf_stats'
-        else:
-            bolt_get_obj_pt_stat_name = 'bolt_get_obj_pt_perf_stats'
+        end_to_end_start_time = time.time()
+        for key in gzip_keys:
+            try:
+                resp, ttfb_time, ttlb_time, data = self._get_object_timed(client, bucket, key, keep_body=True)
+            except Exception as e:
+                self._record_error(client, e)
+                continue
+            fetch_times.append(ttlb_time)
+            fetch_ttfbs.append(ttfb_time)
+            compressed_sizes.append(len(data))
+            decode_futures.append(decode_executor.submit(_decompress, data))
+
+        # objects that could not be decompressed are counted as decode errors (rather than failed requests,
+        # as they were fetched successfully) and left out of the compression statistics.
+        decode_errors = {}
+        decoded_fetch_times = []
+        decoded_fetch_ttfbs = []
+        decoded_compressed_sizes = []
+        decompressed_sizes = []
+        decode_times = []
+        for fetch_time, fetch_ttfb, compressed_size, decode_future in zip(fetch_times, fetch_ttfbs,
+                                                                           compressed_sizes, decode_futures):
+            try:
+                decompressed_size, decode_time = decode_future.result()
+            except Exception as e:
+                decode_errors[type(e).__name__] = decode_errors.get(type(e).__name__, 0) + 1
+                continue
+            decoded_fetch_times.append(fetch_time)
+            decoded_fetch_ttfbs.append(fetch_ttfb)
+            decoded_compressed_sizes.append(compressed_size)
+            decompressed_sizes.append(decompressed_size)
+            decode_times.append(decode_time)
+        end_to_end_time = time.time() - end_to_end_start_time
+
+        backend = self._backend(client)
+        if not decompressed_sizes:
+            return {
+                'object_count': 0,
+                'fetch': self._compute_perf_stats(fetch_times, backend=backend, operation='get_object_gzip_fetch'),
+                'decode_error_count': sum(decode_errors.values()),
+                'decode_errors': decode_errors
+            }
+
+        # estimate the time to fetch the objects had they been stored uncompressed: the same requests,
+        # each transferring its extra (decompressed - compressed) bytes at the observed bandwidth. The
+        # bandwidth is measured after the first byte, so that request latency is not counted as transfer time.
+        compressed_bytes = math.fsum(decoded_compressed_sizes)
+        decompressed_bytes = math.fsum(decompressed_sizes)
+        transfer_time = math.fsum(fetch_time - fetch_ttfb for fetch_time, fetch_ttfb
+                                  in zip(decoded_fetch_times, decoded_fetch_ttfbs))
+        fetch_bytes_per_sec = compressed_bytes / transfer_time if transfer_time > 0 else None
+        uncompressed_fetch_time = math.fsum(decoded_fetch_times)
+        if fetch_bytes_per_sec:
+            uncompressed_fetch_time += (decompressed_bytes - compressed_bytes) / fetch_bytes_per_sec
+
+        self._metrics.add('EndToEndTime', end_to_end_time, 'Seconds', backend, 'get_object_gzip')
+        self._metrics.add('DecodeErrors', sum(decode_errors.values()), 'Count', backend, 'get_object_gzip')
+        self._metrics.add('UncompressedFetchTime', uncompressed_fetch_time, 'Seconds', backend, 'get_object_gzip')
+
+        return {
+            'object_count': len(decompressed_sizes),
+            'fetch': self._compute_perf_stats(fetch_times, obj_sizes=list(compressed_sizes),
+                                              backend=backend, operation='get_object_gzip_fetch'),
+            'fetch_ttfb': self._compute_perf_stats(fetch_ttfbs, backend=backend,
+                                                   operation='get_object_gzip_fetch_ttfb'),
+            'decode': self._compute_perf_stats(decode_times, obj_sizes=list(decompressed_sizes),
+                                               backend=backend, operation='get_object_gzip_decode'),
+            'decode_error_count': sum(decode_errors.values()),
+            'decode_errors': decode_errors,
+            'compression_ratio': "{:.2f}".format(decompressed_bytes / compressed_bytes),
+            'fetch_bandwidth (after first byte)': "{:.2f} bytes/sec".format(fetch_bytes_per_sec)
+            if fetch_bytes_per_sec else None,
+            'decode_throughput': "{:.2f} bytes/sec".format(decompressed_bytes / math.fsum(decode_times)),
+            'end_to_end_time (compressed)': "{:.2f} secs".format(end_to_end_time),
+            'fetch_time (uncompressed, estimated)': "{:.2f} secs".format(uncompressed_fetch_time),
+            'compression_net_win': end_to_end_time < uncompressed_fetch_time
+        }
+
+    def _get_object_pipeline_perf(self, bucket, event):
+        """
+        Measures the Get Object performance (latency, throughput) of Bolt / S3 while scanning a bucket, with
+        listing pages feeding a bounded queue of keys that is consumed by concurrent Get Object workers.
+        :param bucket: bucket name
+        :param event: incoming event data (prefix, scanLimit, queueSize)
+        :return: Get Object pipeline performance statistics
+        """
+        prefix = str(event.get('prefix', ''))
+        scan_limit = int(event['scanLimit']) if 'scanLimit' in event else None
+        queue_size = max(1, int(event.get('queueSize', self.QUEUE_SIZE)))
+
+        s3_pipeline_perf_stats = self._measure_pipeline(self._s3_client, bucket, prefix, scan_limit, queue_size)
+        bolt_pipeline_perf_stats = self._measure_pipeline(self._bolts3_client, bucket, prefix, scan_limit,
+                                                          queue_size)
+
+        return {
+            'prefix': prefix,
+            'scan_limit': scan_limit,
+            'queue_size': queue_size,
+            'concurrency': self.CONCURRENCY,
+            's3_get_obj_pipeline_perf_stats': s3_pipeline_perf_stats,
+            'bolt_get_obj_pipeline_perf_stats': bolt_pipeline_perf_stats
+        }
+
+    def _measure_pipeline(self, client, bucket, prefix, scan_limit, queue_size):
+        """
+        Lists keys from Bolt / S3 page by page into a bounded queue, while CONCURRENCY workers get the
+        queued objects. Listing blocks whenever the queue is full (backpressure). If keys were passed in
+        input, they are queued instead of listing the bucket.
+        :param client: Bolt / S3 client
+        :param bucket: bucket name
+        :param prefix: prefix of keys to be scanned
+        :param scan_limit: max. no of objects to be scanned (None scans all objects)
+        :param queue_size: max. no of listed keys waiting to be fetched
+        :return: listing, fetch and end-to-end scan performance statistics
+        """
+        key_queue = queue.Queue(maxsize=queue_size)
+        list_stats = {'pages': 0, 'keys': 0, 'list_time': 0.0, 'blocked_time': 0.0}
+
+        def enqueue(keys):
+            # returns False once scan_limit keys have been queued.
+            for key in keys:
+                if scan_limit is not None and list_stats['keys'] >= scan_limit:
+                    return False
+                put_start_time = time.time()
+                key_queue.put(key)
+                list_stats['blocked_time'] += time.time() - put_start_time
+                list_stats['keys'] += 1
+            return True
+
+        def produce():
+            try:
+                if self._keys is not None:
+                    enqueue(self._keys)
+                    return
+                list_kwargs = {'Bucket': bucket, 'Prefix': prefix}
+                while True:
+                    list_start_time = time.time()
+                    resp = client.list_objects_v2(**list_kwargs)
+                    list_stats['list_time'] += time.time() - list_start_time
+                    list_stats['pages'] += 1
+                    if not enqueue(item['Key'] for item in resp.get('Contents', [])):
+                        return
+                    if not resp.get('IsTruncated'):
+                        return
+                    list_kwargs['ContinuationToken'] = resp['NextContinuationToken']
+            except Exception as e:
+                self._record_error(client, e)
+            finally:
+                # signal each worker that there are no more keys.
+                for _ in range(self.CONCURRENCY):
+                    key_queue.put(None)
+
+        def consume():
+            get_obj_times = []
+            get_obj_ttfbs = []
+            obj_sizes = []
+            idle_time = 0.0
+            while True:
+                get_start_time = time.time()
+                key = key_queue.get()
+                idle_time += time.time() - get_start_time
+                if key is None:
+                    return get_obj_times, get_obj_ttfbs, obj_sizes, idle_time
+                try:
+                    resp, ttfb_time, ttlb_time, _ = self._get_object_timed(client, bucket, key)
+                except Exception as e:
+                    self._record_error(client, e)
+                    continue
+                get_obj_times.append(ttlb_time)
+                get_obj_ttfbs.append(ttfb_time)
+                obj_sizes.append(resp.get('ContentLength', 0))
+
+        scan_start_time = time.time()
+        producer = threading.Thread(target=produce)
+        producer.start()
+        with ThreadPoolExecutor(max_workers=self.CONCURRENCY) as executor:
+            results = [future.result() for future in [executor.submit(consume) for _ in range(self.CONCURRENCY)]]
+        producer.join()
+        scan_time = time.time() - scan_start_time
+
+        get_obj_times = []
+        get_obj_ttfbs = []
+        obj_sizes = []
+        for worker_get_obj_times, worker_get_obj_ttfbs, worker_obj_sizes, worker_idle_time in results:
+            get_obj_times.extend(worker_get_obj_times)
+            get_obj_ttfbs.extend(worker_get_obj_ttfbs)
+            obj_sizes.extend(worker_obj_sizes)
+        total_bytes = math.fsum(obj_sizes)
+
+        backend = self._backend(client)
+        self._metrics.add('ScanThroughput', len(get_obj_times) / scan_time, 'Count/Second', backend,
+                          'get_object_pipeline')
+        self._metrics.add('ScanBandwidth', total_bytes / scan_time, 'Bytes/Second', backend, 'get_object_pipeline')
 
         return {
-            bolt_get_obj_pt_stat_name: bolt_get_obj_pt_perf_stats,
-            'bolt_object_count (compressed)': bolt_cmp_obj_count,
-            'bolt_object_count (uncompressed)': bolt_uncmp_obj_count
+            'object_count': len(get_obj_times),
+            'scan_time': "{:.2f} secs".format(scan_time),
+            'scan_throughput': "{:.2f} objects/sec".format(len(get_obj_times) / scan_time),
+            'scan_bandwidth': "{:.2f} bytes/sec".format(total_bytes / scan_time),
+            'list': {
+                'pages': list_stats['pages'],
+                'keys': list_stats['keys'],
+                'list_time': "{:.2f} secs".format(list_stats['list_time']),
+                'blocked_time (queue full)': "{:.2f} secs".format(list_stats['blocked_time'])
+            },
+            'worker_idle_time (queue empty)': "{:.2f} secs".format(sum(result[3] for result in results)),
+            # objects are fetched concurrently, so throughput is computed over the wall clock time of the scan.
+            'get_obj_perf_stats': self._compute_perf_stats(get_obj_times, obj_sizes=obj_sizes,
+                                                           op_elapsed_time=scan_time, backend=backend,
+                                                           operation='get_object_pipeline', size_class='all'),
+            'get_obj_ttfb_perf_stats': self._compute_perf_stats(get_obj_ttfbs, op_elapsed_time=scan_time,
+                                                                backend=backend,
+                                                                operation='get_object_pipeline_ttfb')
         }
 
     def _delete_object_perf(self, bucket):
@@ -294,33 +809,110 @@ class BoltS3Perf:
 
         # Delete Objects from S3.
         for key in self._keys:
-            del_obj_start_time = time.time()
-            self._s3_client.delete_object(Bucket=bucket, Key=key)
-            del_obj_end_time = time.time()
-            # calc latency
-            del_obj_time = del_obj_end_time - del_obj_start_time
-            s3_del_obj_times.append(del_obj_time)
+            try:
+                del_obj_start_time = time.time()
+                self._s3_client.delete_object(Bucket=bucket, Key=key)
+                del_obj_end_time = time.time()
+                # calc latency
+                del_obj_time = del_obj_end_time - del_obj_start_time
+                s3_del_obj_times.append(del_obj_time)
+            except Exception as e:
+                self._record_error(self._s3_client, e)
 
         # Delete Objects from Bolt.
         for key in self._keys:
-            del_obj_start_time = time.time()
-            self._bolts3_client.delete_object(Bucket=bucket, Key=key)
-            del_obj_end_time = time.time()
-            # calc latency.
-            del_obj_time = del_obj_end_time - del_obj_start_time
-            bolt_del_obj_times.append(del_obj_time)
+            try:
+                del_obj_start_time = time.time()
+                self._bolts3_client.delete_object(Bucket=bucket, Key=key)
+                del_obj_end_time = time.time()
+                # calc latency.
+                del_obj_time = del_obj_end_time - del_obj_start_time
+                bolt_del_obj_times.append(del_obj_time)
+            except Exception as e:
+                self._record_error(self._bolts3_client, e)
 
         # calc s3 perf stats
-        s3_del_obj_perf_stats = self._compute_perf_stats(s3_del_obj_times)
+        s3_del_obj_perf_stats = self._compute_perf_stats(s3_del_obj_times, backend='s3', operation='delete_object')
 
         # calc bolt perf stats
-        bolt_del_obj_perf_stats = self._compute_perf_stats(bolt_del_obj_times)
+        bolt_del_obj_perf_stats = self._compute_perf_stats(bolt_del_obj_times, backend='bolt',
+                                                           operation='delete_object')
 
         return {
             's3_del_obj_perf_stats': s3_del_obj_perf_stats,
             'bolt_del_obj_perf_stats': bolt_del_obj_perf_stats
         }
 
+    def _put_object_scaling_perf(self, bucket, event):
+        """
+        Measures the Put / Delete Object throughput of Bolt / S3 as a function of the number of
+        prefixes (shards) the objects are spread across.
+        :param bucket: bucket name
+        :param event: incoming event data (shardCounts)
+        :return: Put / Delete Object performance statistics per shard count
+        """
+        shard_counts = []
+        for shard_count in event.get('shardCounts', self.SHARD_COUNTS):
+            shard_count = int(shard_count)
+            if shard_count < 1:
+                raise ValueError("unsupported shard count: {:d}".format(shard_count))
+            # each shard count is measured once.
+            if shard_count not in shard_counts:
+                shard_counts.append(shard_count)
+        value_bytes = self._generate(characters=string.ascii_lowercase, length=self.OBJ_LENGTH).encode()
+
+        scaling_perf_stats = {}
+        for shard_count in shard_counts:
+            keys = self._generate_key_names(self.NUM_KEYS, key_layout='SHARDED', num_shards=shard_count)
+            shard_perf_stats = {}
+            for client_name, client in (('s3', self._s3_client), ('bolt', self._bolts3_client)):
+                put_obj_times, put_obj_time = self._run_concurrent(
+                    client, lambda key: client.put_object(Bucket=bucket, Key=key, Body=value_bytes), keys)
+                del_obj_times, del_obj_time = self._run_concurrent(
+                    client, lambda key: client.delete_object(Bucket=bucket, Key=key), keys)
+                put_obj_perf_stats = self._compute_perf_stats(
+                    put_obj_times, op_elapsed_time=put_obj_time, backend=client_name,
+                    operation="put_object_{:d}_shards".format(shard_count),
+                    size_class=self._size_class(self.OBJ_LENGTH))
+                del_obj_perf_stats = self._compute_perf_stats(
+                    del_obj_times, op_elapsed_time=del_obj_time, backend=client_name,
+                    operation="delete_object_{:d}_shards".format(shard_count))
+                shard_perf_stats[client_name + '_put_obj_perf_stats'] = put_obj_perf_stats
+                shard_perf_stats[client_name + '_del_obj_perf_stats'] = del_obj_perf_stats
+            scaling_perf_stats["{:d} shards".format(shard_count)] = shard_perf_stats
+
+        return {
+            'object_size': "{:d} bytes".format(self.OBJ_LENGTH),
+            'num_keys': self.NUM_KEYS,
+            'concurrency': self.CONCURRENCY,
+            'put_del_obj_scaling_perf_stats': scaling_perf_stats
+        }
+
+    def _run_concurrent(self, client, op, keys):
+        """
+        Performs an operation on each of the keys, with up to CONCURRENCY operations in flight at any time.
+        Failed operations are recorded and left out of the latencies.
+        :param client: Bolt / S3 client used by the operation
+        :param op: operation to be performed, called with the key name
+        :param keys: list of key names
+        :return: list of latencies, total (wall clock) time taken
+        """
+        def run(key):
+            try:
+                op_start_time = time.time()
+                op(key)
+                op_end_time = time.time()
+            except Exception as e:
+                self._record_error(client, e)
+                return None
+            return op_end_time - op_start_time
+
+        run_start_time = time.time()
+        with ThreadPoolExecutor(max_workers=self.CONCURRENCY) as executor:
+            op_times = [op_time for op_time in executor.map(run, keys) if op_time is not None]
+        run_time = time.time() - run_start_time
+        return op_times, run_time
+
     def _list_objects_v2_perf(self, bucket, num_iter=10):
         """
         Measures the List Objects V2 performance (latency, throughput) of Bolt / S3.
@@ -336,9 +928,13 @@ class BoltS3Perf:
 
         # list 1000 objects from S3, num_iter times.
         for x in range(num_iter):
-            list_objects_v2_start_time = time.time()
-            s3_resp = self._s3_client.list_objects_v2(Bucket=bucket)
-            list_objects_v2_end_time = time.time()
+            try:
+                list_objects_v2_start_time = time.time()
+                s3_resp = self._s3_client.list_objects_v2(Bucket=bucket)
+                list_objects_v2_end_time = time.time()
+            except Exception as e:
+                self._record_error(self._s3_client, e)
+                continue
             # calc latency
             list_objects_v2_time = list_objects_v2_end_time - list_objects_v2_start_time
             s3_list_objects_v2_times.append(list_objects_v2_time)
@@ -348,9 +944,13 @@ class BoltS3Perf:
 
         # list 1000 objects from Bolt, num_iter times.
         for x in range(num_iter):
-            list_objects_v2_start_time = time.time()
-            bolt_resp = self._bolts3_client.list_objects_v2(Bucket=bucket)
-            list_objects_v2_end_time = time.time()
+            try:
+                list_objects_v2_start_time = time.time()
+                bolt_resp = self._bolts3_client.list_objects_v2(Bucket=bucket)
+                list_objects_v2_end_time = time.time()
+            except Exception as e:
+                self._record_error(self._bolts3_client, e)
+                continue
             # calc latency
             list_objects_v2_time = list_objects_v2_end_time - list_objects_v2_start_time
             bolt_list_objects_v2_times.append(list_objects_v2_time)
@@ -360,17 +960,209 @@ class BoltS3Perf:
 
         # calc s3 perf stats
         s3_list_objects_v2_perf_stats = self._compute_perf_stats(s3_list_objects_v2_times,
-                                                                 s3_list_objects_v2_tp)
+                                                                 s3_list_objects_v2_tp,
+                                                                 backend='s3', operation='list_objects_v2')
 
         # calc bolt perf stats
         bolt_list_objects_v2_perf_stats = self._compute_perf_stats(bolt_list_objects_v2_times,
-                                                                   bolt_list_objects_v2_tp)
+                                                                   bolt_list_objects_v2_tp,
+                                                                   backend='bolt', operation='list_objects_v2')
 
         return {
             's3_list_objects_v2': s3_list_objects_v2_perf_stats,
             'bolt_list_objects_v2': bolt_list_objects_v2_perf_stats
         }
 
+    def _workload_perf(self, bucket, event):
+        """
+        Measures the performance (latency, throughput) of Bolt / S3 under a mixed workload, i.e a weighted mix of
+        operations sent concurrently against keys picked from a key popularity distribution.
+        :param bucket: bucket name
+        :param event: incoming event data (opWeights, keyDistribution, zipfSkew, keyFrequencyKey, seed)
+        :return: per-operation performance statistics of the workload
+        """
+        # operation mix.
+        op_weights = self.OP_WEIGHTS
+        if 'opWeights' in event:
+            op_weights = {str(op).upper(): float(weight) for op, weight in event['opWeights'].items()}
+        for op in op_weights:
+            if op not in self.WORKLOAD_OPS:
+                raise ValueError("unsupported workload operation: {}".format(op))
+        ops = [op for op in op_weights if op_weights[op] > 0]
+        if not ops:
+            raise ValueError("opWeights must contain at least one operation with a positive weight")
+
+        # the workload is generated from the seed passed in input, if any, so that it can be reproduced.
+        rand = random.Random(event.get('seed'))
+
+        # key popularity distribution.
+        if 'keyDistribution' in event:
+            key_distribution = str(event['keyDistribution']).upper()
+        else:
+            key_distribution = 'UNIFORM'
+        if key_distribution == 'UNIFORM':
+            key_weights = None
+            key_distribution_name = 'uniform'
+        elif key_distribution == 'ZIPF':
+            zipf_skew = float(event['zipfSkew']) if 'zipfSkew' in event else 1.0
+            key_weights = self._zipf_weights(len(self._keys), zipf_skew, rand)
+            key_distribution_name = "zipf (skew {:.2f})".format(zipf_skew)
+        elif key_distribution == 'REPLAY':
+            self._keys, key_weights = self._load_key_frequencies(bucket, event['keyFrequencyKey'])
+            key_distribution_name = "replay ({})".format(event['keyFrequencyKey'])
+        else:
+            raise ValueError("unsupported key distribution: {}".format(event['keyDistribution']))
+        if not self._keys:
+            raise ValueError("no keys available to run the workload")
+
+        # generate the schedule (operation, key index) up front, so that both Bolt and S3
+        # are sent exactly the same sequence of requests.
+        schedule_ops = rand.choices(ops, weights=[op_weights[op] for op in ops], k=self.NUM_REQUESTS)
+        schedule_keys = rand.choices(range(len(self._keys)), weights=key_weights, k=self.NUM_REQUESTS)
+        schedule = list(zip(schedule_ops, schedule_keys))
+
+        # PUTs are sent to key names under a prefix unique to this run, so that existing objects
+        # (including the keys being read) are never overwritten or deleted.
+        run_id = self._generate(characters=string.ascii_lowercase + string.digits, length=16)
+        put_keys = [self.WORKLOAD_PREFIX + run_id + '/' + str(x) for x in range(len(self._keys))]
+        value_bytes = self._generate(characters=string.ascii_lowercase, length=self.OBJ_LENGTH).encode()
+
+        try:
+            s3_workload_perf_stats = self._run_workload(self._s3_client, bucket, schedule, put_keys, value_bytes)
+            bolt_workload_perf_stats = self._run_workload(self._bolts3_client, bucket, schedule, put_keys,
+                                                          value_bytes)
+        finally:
+            # clean up objects uploaded by the workload.
+            put_key_indices = {key_index for op, key_index in schedule if op == 'PUT_OBJECT'}
+            for key_index in put_key_indices:
+                for client in (self._s3_client, self._bolts3_client):
+                    try:
+                        client.delete_object(Bucket=bucket, Key=put_keys[key_index])
+                    except Exception as e:
+                        self._record_error(client, e)
+
+        return {
+            'workload': {
+                'num_requests': self.NUM_REQUESTS,
+                'concurrency': self.CONCURRENCY,
+                'num_keys': len(self._keys),
+                'key_distribution': key_distribution_name,
+                'op_weights': {op.lower(): op_weights[op] for op in ops}
+            },
+            's3_workload_perf_stats': s3_workload_perf_stats,
+            'bolt_workload_perf_stats': bolt_workload_perf_stats
+        }
+
+    def _run_workload(self, client, bucket, schedule, put_keys, value_bytes):
+        """
+        Sends the scheduled requests concurrently to Bolt / S3 and measures their performance.
+        :param client: Bolt / S3 client
+        :param bucket: bucket name
+        :param schedule: list of (operation, key index) to be performed
+        :param put_keys: key names used by PUT operations
+        :param value_bytes: object data used by PUT operations
+        :return: per-operation performance statistics
+        """
+        def run(request):
+            op, key_index = request
+            obj_size = None
+            ttfb_time = None
+            try:
+                op_start_time = time.time()
+                if op == 'GET_OBJECT':
+                    resp, ttfb_time, _, _ = self._get_object_timed(client, bucket, self._keys[key_index])
+                    obj_size = resp.get('ContentLength')
+                elif op == 'HEAD_OBJECT':
+                    resp = client.head_object(Bucket=bucket, Key=self._keys[key_index])
+                    obj_size = resp.get('ContentLength')
+                elif op == 'PUT_OBJECT':
+                    client.put_object(Bucket=bucket, Key=put_keys[key_index], Body=value_bytes)
+                    obj_size = len(value_bytes)
+                elif op == 'LIST_OBJECTS_V2':
+                    client.list_objects_v2(Bucket=bucket)
+                op_end_time = time.time()
+            except Exception as e:
+                self._record_error(client, e)
+                return op, None, None, None
+            return op, op_end_time - op_start_time, obj_size, ttfb_time
+
+        workload_start_time = time.time()
+        with ThreadPoolExecutor(max_workers=self.CONCURRENCY) as executor:
+            results = list(executor.map(run, schedule))
+        workload_time = time.time() - workload_start_time
+
+        # group latencies and object sizes by operation.
+        op_times = {}
+        op_obj_sizes = {}
+        op_ttfbs = {}
+        op_error_counts = {}
+        for op, op_time, obj_size, ttfb_time in results:
+            if op_time is None:
+                op_error_counts[op] = op_error_counts.get(op, 0) + 1
+                continue
+            op_times.setdefault(op, []).append(op_time)
+            if ttfb_time is not None:
+                op_ttfbs.setdefault(op, []).append(ttfb_time)
+            if obj_size is not None:
+                op_obj_sizes.setdefault(op, []).append(obj_size)
+
+        backend = self._backend(client)
+        workload_tp = (len(results) - sum(op_error_counts.values())) / workload_time
+        self._metrics.add('Throughput', workload_tp, 'Count/Second', backend, 'workload')
+        workload_perf_stats = {
+            'throughput': "{:.2f} requests/sec".format(workload_tp)
+        }
+        # requests are sent concurrently, so the throughput of each operation is its no of requests over
+        # the wall clock time of the workload.
+        for op in self.WORKLOAD_OPS:
+            if op in op_times or op in op_error_counts:
+                op_perf_stats = self._compute_perf_stats(op_times.get(op, []), obj_sizes=op_obj_sizes.get(op),
+                                                         op_elapsed_time=workload_time, backend=backend,
+                                                         operation='workload_' + op.lower(), size_class='all')
+                op_perf_stats['request_count'] = len(op_times.get(op, []))
+                op_perf_stats['failed_request_count'] = op_error_counts.get(op, 0)
+                if op in op_ttfbs:
+                    op_perf_stats['ttfb'] = self._compute_perf_stats(op_ttfbs[op], op_elapsed_time=workload_time,
+                                                                     backend=backend,
+                                                                     operation='workload_' + op.lower() + '_ttfb',
+                                                                     size_class='all')
+                workload_perf_stats[op.lower()] = op_perf_stats
+        return workload_perf_stats
+
+    def _zipf_weights(self, num_keys, skew, rand):
+        """
+        Returns Zipf weights for keys ranked by popularity, i.e the key at rank r is weighted 1 / r^skew.
+        Ranks are assigned to keys in random order, so that the most popular keys are a random sample of
+        the keys rather than the first keys listed (i.e the same prefix).
+        :param num_keys: number of keys
+        :param skew: skew of the distribution (0 is uniform, higher values concentrate on fewer keys)
+        :param rand: random number generator used to assign ranks
+        :return: list of weights, in key order
+        """
+        ranks = list(range(1, num_keys + 1))
+        rand.shuffle(ranks)
+        return [1.0 / math.pow(rank, skew) for rank in ranks]
+
+    def _load_key_frequencies(self, bucket, freq_key):
+        """
+        Loads key names and their access frequencies from an object in the given bucket in S3.
+        Each line of the object is of the form <key>,<frequency>
+        :param bucket: bucket name
+        :param freq_key: key name of the key / frequency object
+        :return: list of key names, list of frequencies
+        """
+        resp = self._s3_client.get_object(Bucket=bucket, Key=freq_key)
+        keys = []
+        frequencies = []
+        for line in resp['Body'].read().decode().splitlines():
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            key, frequency = line.rsplit(',', 1)
+            keys.append(key)
+            frequencies.append(float(frequency))
+        return keys, frequencies
+
     def _all_perf(self, bucket):
         """
         Measures PUT,GET,DELETE,List Objects performance (latency, throughput) of Bolt / S3.
@@ -393,6 +1185,35 @@ class BoltS3Perf:
                                       del_obj_perf_stats,
                                       list_objects_v2_perf_stats)
 
+    def _record_error(self, client, error):
+        """
+        Records a failed request sent by the given Bolt / S3 client.
+        :param client: Bolt / S3 client
+        :param error: exception raised by the request
+        """
+        self._retry_stats[client].record_error(error)
+
+    def _request_stats(self):
+        """
+        Returns the attempts, retries and failures of requests sent to Bolt / S3.
+        :return: request statistics
+        """
+        operation = self._request_type.lower()
+        self._retry_stats[self._s3_client].add_metrics(self._metrics, 's3', operation)
+        self._retry_stats[self._bolts3_client].add_metrics(self._metrics, 'bolt', operation)
+        return {
+            's3_request_stats': self._retry_stats[self._s3_client].stats(),
+            'bolt_request_stats': self._retry_stats[self._bolts3_client].stats()
+        }
+
+    def _backend(self, client):
+        """
+        Returns the name of the backend the given client sends requests to.
+        :param client: Bolt / S3 client
+        :return: s3 or bolt
+        """
+        return 's3' if client is self._s3_client else 'bolt'
+
     def _merge_perf_stats(self, *perf_stats):
         """
         Merge one or more dictionaries containing
@@ -405,14 +1226,26 @@ class BoltS3Perf:
             merged_perf_stats.update(perf_stat)
         return merged_perf_stats
 
-    def _compute_perf_stats(self, op_times, op_tp=None, obj_sizes=None):
+    def _compute_perf_stats(self, op_times, op_tp=None, obj_sizes=None, op_elapsed_time=None,
+                            backend=None, operation=None, size_class=None):
         """
-        Compute performance statistics
+        Compute performance statistics, recording them as numeric metrics if the backend and operation are given.
         :param op_times: list of latencies
         :param op_tp: list of throughputs
         :param obj_sizes: list of object sizes
+        :param op_elapsed_time: wall clock time of operations run concurrently, used to calc throughput
+        :param backend: backend (s3 / bolt) the operations were sent to
+        :param operation: name of the operation
+        :param size_class: size class of the objects (defaults to the size class of the average object size)
         :return: performance statistics (latency, throughput, object size)
         """
+        # no successful operations to compute performance statistics from.
+        if not op_times:
+            return {
+                'latency': None,
+                'throughput': None
+            }
+
         # calc op latency perf.
         op_avg_time = mean(op_times)
         op_time_p50 = median_low(op_times)
@@ -433,7 +1266,10 @@ class BoltS3Perf:
                 'p90': "{:.2f} objects/sec".format(op_tp_p90)
             }
         else:
-            tp = len(op_times) / math.fsum(op_times)
+            if op_elapsed_time:
+                tp = len(op_times) / op_elapsed_time
+            else:
+                tp = len(op_times) / math.fsum(op_times)
             tp_perf_stats = "{:.2f} objects/sec".format(tp)
 
         # calc obj size metrics.
@@ -460,20 +1296,66 @@ class BoltS3Perf:
         if obj_sizes:
             perf_stats['object_size'] = obj_sizes_perf_stats
 
+        # record numeric metrics.
+        if backend is not None:
+            if size_class is None:
+                size_class = self._size_class(obj_avg_size) if obj_sizes else 'all'
+            self._metrics.add('LatencyAverage', op_avg_time, 'Seconds', backend, operation, size_class)
+            self._metrics.add('LatencyP50', op_time_p50, 'Seconds', backend, operation, size_class)
+            self._metrics.add('LatencyP90', op_time_p90, 'Seconds', backend, operation, size_class)
+            self._metrics.add('Throughput', op_avg_tp if op_tp else tp, 'Count/Second', backend, operation,
+                              size_class)
+            self._metrics.add('RequestCount', len(op_times), 'Count', backend, operation, size_class)
+            if obj_sizes:
+                self._metrics.add('ObjectSizeAverage', obj_avg_size, 'Bytes', backend, operation, size_class)
+
         return perf_stats
 
-    def _generate_key_names(self, num_objects):
+    def _generate_key_names(self, num_objects, key_layout=None, num_shards=None):
         """
         Generate Object names to be used in PUT/DELETE Object operations.
+        Key layouts spread object names across prefixes as follows:
+        FLAT - bolt-s3-perf<x>
+        HASHED - <first 4 hex digits of md5 of object name>/bolt-s3-perf<x>
+        SHARDED - shard<x % num_shards>/bolt-s3-perf<x>
+        DATE - <yyyy>/<mm>/<dd>/<hh>/bolt-s3-perf<x>, spread over the num_shards hours up to PARTITION_DATE
         :param num_objects: number of objects
+        :param key_layout: layout of object names (defaults to KEY_LAYOUT)
+        :param num_shards: number of prefixes used by SHARDED / DATE layouts (defaults to NUM_SHARDS)
         :return: list of object names
         """
+        key_layout = key_layout or self.KEY_LAYOUT
+        num_shards = num_shards or self.NUM_SHARDS
+        if key_layout not in ('FLAT', 'HASHED', 'SHARDED', 'DATE'):
+            raise ValueError("unsupported key layout: {}".format(key_layout))
+        if key_layout == 'DATE':
+            partition_date = self._parse_partition_date(self.PARTITION_DATE)
         objects = []
         for x in range(num_objects):
             obj_name = 'bolt-s3-perf' + str(x)
+            if key_layout == 'HASHED':
+                obj_name = hashlib.md5(obj_name.encode()).hexdigest()[:4] + '/' + obj_name
+            elif key_layout == 'SHARDED':
+                obj_name = 'shard' + str(x % num_shards) + '/' + obj_name
+            elif key_layout == 'DATE':
+                partition = partition_date - timedelta(hours=x % num_shards)
+                obj_name = partition.strftime('%Y/%m/%d/%H') + '/' + obj_name
             objects.append(obj_name)
         return objects
 
+    def _parse_partition_date(self, partition_date):
+        """
+        Parses the date of the latest partition used by DATE key layout.
+        :param partition_date: date of the form yyyy-mm-dd or yyyy-mm-ddThh
+        :return: datetime of the latest partition
+        """
+        for date_format in ('%Y-%m-%dT%H', '%Y-%m-%d'):
+            try:
+                return datetime.strptime(partition_date, date_format)
+            except ValueError:
+                pass
+        raise ValueError("unsupported partitionDate: {}".format(partition_date))
+
     def _generate(self, characters=string.ascii_lowercase, length=10):
         """
         Generate a random string of certain length
@@ -489,6 +1371,10 @@ class BoltS3Perf:
         :param bucket: bucket name
         :return: list of first 1000 objects
         """
-        resp = self._s3_client.list_objects_v2(Bucket=bucket, MaxKeys=self.NUM_KEYS)
+        try:
+            resp = self._s3_client.list_objects_v2(Bucket=bucket, MaxKeys=self.NUM_KEYS)
+        except Exception as e:
+            self._record_error(self._s3_client, e)
+            raise
         objects = [item['Key'] for item in resp['Contents']]
         return objects
@@ -9,16 +9,77 @@ def lambda_handler(event, context):
     lambda_handler accepts the following input parameters as part of the event:
     1) requestType - type of request / operation to be performed. The following requests are supported:
        a) list_objects_v2 - list objects
-       b) get_object - get object
+       b) get_object - get object (first and last byte)
        c) get_object_ttfb - get object (first byte)
-       d) get_object_passthrough - get object (via passthrough) of unmonitored bucket
+       d) get_object_passthrough - get object (first and last byte via passthrough) of unmonitored bucket
        e) get_object_passthrough_ttfb - get object (first byte via passthrough) of unmonitored bucket
-       f) put_object - upload object
-       g) delete_object - delete object
-       h) all - put, get, delete, list objects (default request if none specified)
+       f) get_object_cold_warm - get object, reading each key several times (first vs repeat reads)
+       g) get_object_gzip - get object (gzip encoded), timing fetch and decompression separately
+       h) get_object_pipeline - get objects while listing the bucket, without listing all keys upfront
+       i) put_object - upload object
+       j) delete_object - delete object
+       k) put_object_scaling - upload / delete objects concurrently, spread across an increasing number of prefixes
+       l) workload - weighted mix of get, head, put, list objects sent concurrently
+       m) all - put, get, delete, list objects (default request if none specified)
 
     2) bucket - bucket name
 
+    3) ttfbBodyHandling - handling of the rest of the body by get_object_ttfb and get_object_passthrough_ttfb
+       (optional): drain (default) reads the rest of the body, so that the connection is reused, whereas close
+       closes the body after the first byte, which discards the connection
+
+    4) retry parameters (optional):
+       a) retryMode - retry mode of the clients: legacy, standard or adaptive
+       b) maxAttempts - max. no of attempts per request, including the initial attempt
+
+    5) key layout parameters (optional, used by put_object, delete_object and all):
+       a) keyLayout - layout of generated key names: flat (default), hashed, sharded or date
+       b) numShards - number of prefixes used by sharded and date key layouts (default 16)
+       c) partitionDate - date (yyyy-mm-dd or yyyy-mm-ddThh) of the latest hourly partition used by date key
+          layout (default 2021-01-01). Pass the same value to put_object and delete_object, so that the delete
+          removes the objects uploaded by the put
+       d) shardCounts - shard counts (at least 1) used by put_object_scaling (default [1, 2, 4, 8, 16])
+
+    6) workload parameters (optional, used by workload):
+       a) opWeights - weights of each operation in the mix (default {"get_object": 80, "head_object": 15,
+          "put_object": 5})
+       b) keyDistribution - key popularity distribution: uniform (default), zipf or replay
+       c) zipfSkew - skew of the zipf distribution (default 1.0). Popularity ranks are assigned to keys in random
+          order (reproducible with seed)
+       d) keyFrequencyKey - key of an object in the bucket with lines of the form <key>,<frequency>,
+          used by the replay distribution
+       e) numRequests - number of requests sent to each of Bolt / S3 (default 1000)
+       f) concurrency - number of requests in flight at any time, also used by put_object_scaling (default 10).
+          The connection pool of the clients is sized to match.
+       g) seed - seed used to generate the workload
+       Workload PUTs upload objects under bolt-s3-workload/<run id>/, which are deleted once the workload ends.
+
+    7) cold / warm parameters (optional, used by get_object_cold_warm):
+       a) numReads - number of times each key is read (default 3)
+       b) readGap - gap (secs) before each repeat round of reads, a single value or a list with one value per
+          repeat round (default 0)
+       c) cacheHitRatio - a repeat read faster than this fraction of the key's first read is counted as a
+          cache hit (default 0.5)
+
+    8) gzip parameters (optional, used by get_object_gzip):
+       a) decodeWorkers - number of workers used to decompress objects (default no. of CPUs)
+       Only gzip encoded objects are fetched. The end-to-end time (fetch and decompression) is compared with the
+       estimated time to fetch the same objects uncompressed: the observed fetch times plus the extra bytes at the
+       bandwidth observed after the first byte. Objects that fail to decompress are counted as decode errors,
+       separately from failed requests.
+
+    9) pipeline parameters (optional, used by get_object_pipeline):
+       a) prefix - prefix of keys to be scanned (default all keys)
+       b) scanLimit - max. no of objects to be scanned (default all objects)
+       c) queueSize - max. no of listed keys waiting to be fetched (default 1000)
+       d) concurrency - number of get object workers (default 10). The connection pool of the clients is sized
+          to match, plus one connection for listing
+
+    10) metrics parameters (optional):
+       a) metricsFormat - emit numeric metrics, with backend, operation, bucket and object size class dimensions,
+          as CloudWatch EMF log lines (emf) or as an OpenMetrics payload in the response (openmetrics)
+       b) metricsNamespace - namespace of the metrics (default BoltS3)
+
     Following are examples of events, for various requests, that can be used to invoke the handler function.
     a) Measure List objects performance of Bolt / S3.
        {"requestType": "list_objects_v2", "bucket": "<bucket>"}
@@ -35,15 +96,40 @@ def lambda_handler(event, context):
     e) Measure Get object passthrough (first byte) performance of Bolt.
        {"requestType": "get_object_passthrough_ttfb", "bucket": "<unmonitored-bucket>"}
 
-    f) Measure Put object performance of Bolt / S3.
+    f) Measure first read vs repeat read (cache) performance of Bolt / S3.
+       {"requestType": "get_object_cold_warm", "bucket": "<bucket>", "numReads": 3, "readGap": [0, 60]}
+
+    g) Measure fetch vs decompression performance of gzip encoded objects in Bolt / S3.
+       {"requestType": "get_object_gzip", "bucket": "<bucket>"}
+
+    h) Measure Get object performance of Bolt / S3 while scanning a bucket.
+       {"requestType": "get_object_pipeline", "bucket": "<bucket>", "concurrency": 32, "queueSize": 2000}
+
+    i) Measure Put object performance of Bolt / S3.
        {"requestType": "put_object", "bucket": "<bucket>"}
 
-    g) Measure Delete object performance of Bolt / S3.
+    j) Measure Delete object performance of Bolt / S3.
        {"requestType": "delete_object", "bucket": "<bucket>"}
 
-    h) Measure Put, Delete, Get, List objects performance of Bolt / S3.
+    k) Measure Put / Delete object throughput of Bolt / S3 as objects are spread across more prefixes.
+       {"requestType": "put_object_scaling", "bucket": "<bucket>", "concurrency": 64, "shardCounts": [1, 4, 16]}
+
+    l) Measure performance of Bolt / S3 under a mixed workload with zipf key popularity.
+       {"requestType": "workload", "bucket": "<bucket>", "keyDistribution": "zipf", "zipfSkew": 1.2,
+        "opWeights": {"get_object": 80, "head_object": 15, "put_object": 5}}
+
+    m) Measure Put, Delete, Get, List objects performance of Bolt / S3.
        {"requestType": "all", "bucket": "<bucket>"}
 
+    n) Measure Get object performance of Bolt / S3, emitting CloudWatch EMF metrics.
+       {"requestType": "get_object", "bucket": "<bucket>", "metricsFormat": "emf"}
+
+    Every get object test records the time to first byte and time to last byte of the same request.
+
+    Failed requests are recorded rather than aborting the test. The response includes s3_request_stats and
+    bolt_request_stats: the attempts made per request, retry reasons, time spent backing off between attempts
+    and errors of requests sent to S3 / Bolt.
+
     :param event: incoming event data
     :param context: runtime information
     :return: response from BoltS3Perf
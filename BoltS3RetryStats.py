@@ -0,0 +1,135 @@
+import threading
+import time
+
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+
+class BoltS3RetryStats:
+    """
+    BoltS3RetryStats instruments a Bolt / S3 client to record the attempts made per request, the reasons
+    requests were retried (e.g 503 SlowDown, timeouts, connection resets) and the time spent backing off
+    between attempts. Requests that eventually failed are recorded by the caller via record_error.
+    """
+
+    def __init__(self, client):
+        self._lock = threading.Lock()
+        # state of the request in progress, per thread.
+        self._local = threading.local()
+        self._requests = 0
+        self._attempts = 0
+        self._attempts_per_request = {}
+        self._retry_reasons = {}
+        self._backoff_time = 0.0
+        self._errors = {}
+
+        events = client.meta.events
+        events.register('before-call.s3', self._before_call)
+        events.register('before-send.s3', self._before_send)
+        events.register('needs-retry.s3', self._needs_retry)
+        events.register('after-call.s3', self._after_call)
+        events.register('after-call-error.s3', self._after_call)
+
+    @staticmethod
+    def client_config(event, max_pool_connections=None):
+        """
+        Returns the client configuration for the retry mode and max. attempts passed in the event, if any,
+        and the given connection pool size.
+        :param event: incoming event data (retryMode, maxAttempts)
+        :param max_pool_connections: max. no of connections kept in the pool (defaults to botocore's default)
+        :return: client configuration or None
+        """
+        config = {}
+        retries = {}
+        if 'retryMode' in event:
+            retries['mode'] = str(event['retryMode']).lower()
+        if 'maxAttempts' in event:
+            retries['total_max_attempts'] = int(event['maxAttempts'])
+        if retries:
+            config['retries'] = retries
+        if max_pool_connections is not None:
+            config['max_pool_connections'] = max_pool_connections
+        if not config:
+            return None
+        return Config(**config)
+
+    def record_error(self, error):
+        """
+        Records a request that failed (after any retries).
+        :param error: exception raised by the request
+        """
+        if isinstance(error, ClientError):
+            error_code = error.response['Error']['Code']
+        else:
+            error_code = type(error).__name__
+        with self._lock:
+            self._errors[error_code] = self._errors.get(error_code, 0) + 1
+
+    def stats(self):
+        """
+        Returns the statistics recorded so far.
+        :return: request, attempt, retry and error statistics
+        """
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'attempts': self._attempts,
+                'attempts_per_request': {str(attempts): count for attempts, count
+                                         in sorted(self._attempts_per_request.items())},
+                'retry_reasons': dict(self._retry_reasons),
+                'backoff_time': "{:.2f} secs".format(self._backoff_time),
+                'failed_requests': sum(self._errors.values()),
+                'errors': dict(self._errors)
+            }
+
+    def add_metrics(self, metrics, backend, operation):
+        """
+        Records the statistics recorded so far as numeric metrics.
+        :param metrics: BoltS3Metrics to record the metrics in
+        :param backend: backend (s3 / bolt)
+        :param operation: operation
+        """
+        with self._lock:
+            metrics.add('Requests', self._requests, 'Count', backend, operation)
+            metrics.add('Attempts', self._attempts, 'Count', backend, operation)
+            metrics.add('Retries', sum(self._retry_reasons.values()), 'Count', backend, operation)
+            metrics.add('BackoffTime', self._backoff_time, 'Seconds', backend, operation)
+            metrics.add('FailedRequests', sum(self._errors.values()), 'Count', backend, operation)
+
+    def _before_call(self, **kwargs):
+        self._local.attempts = 0
+        self._local.retry_reason = None
+
+    def _before_send(self, **kwargs):
+        # a pending retry reason means the previous attempt of this request is being retried.
+        retry_reason = getattr(self._local, 'retry_reason', None)
+        with self._lock:
+            self._attempts += 1
+            if retry_reason is not None:
+                self._retry_reasons[retry_reason] = self._retry_reasons.get(retry_reason, 0) + 1
+                self._backoff_time += time.time() - self._local.retry_time
+        self._local.attempts = getattr(self._local, 'attempts', 0) + 1
+        self._local.retry_reason = None
+
+    def _needs_retry(self, response=None, caught_exception=None, **kwargs):
+        # the outcome of every attempt is kept as the retry reason; whether the attempt is actually retried
+        # (e.g throttling, timeouts, region redirects, expired tokens) is only known once the next attempt
+        # is sent, in _before_send.
+        if caught_exception is not None:
+            reason = type(caught_exception).__name__
+        elif response is not None:
+            http_response, parsed = response
+            status_code = http_response.status_code
+            error_code = parsed.get('Error', {}).get('Code')
+            reason = "{:d} {}".format(status_code, error_code) if error_code else str(status_code)
+        else:
+            reason = 'unknown'
+        self._local.retry_reason = reason
+        self._local.retry_time = time.time()
+
+    def _after_call(self, **kwargs):
+        attempts = getattr(self._local, 'attempts', 0)
+        with self._lock:
+            self._requests += 1
+            self._attempts_per_request[attempts] = self._attempts_per_request.get(attempts, 0) + 1
+        self._local.retry_reason = None
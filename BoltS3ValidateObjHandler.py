@@ -2,7 +2,13 @@ import boto3
 import bolt as bolt3
 from botocore.exceptions import ClientError
 import hashlib
-import gzip
+import zlib
+
+# size of the chunks read from the body of an object while computing its MD5.
+CHUNK_SIZE = 1024 * 1024
+
+# stored checksums compared by tiered validation, in order of preference.
+CHECKSUM_FIELDS = ('ChecksumSHA256', 'ChecksumSHA1', 'ChecksumCRC64NVME', 'ChecksumCRC32C', 'ChecksumCRC32')
 
 
 def lambda_handler(event, context):
@@ -13,39 +19,111 @@ def lambda_handler(event, context):
     lambda_handler accepts the following input parameters as part of the event:
     1) bucket - bucket name
     2) key - key name
+    3) keys - list of key names, validated instead of key (optional)
+    4) bucketClean - ON if the object is not retained in S3 by Bolt (default OFF)
+    5) validationMode - full (default) or tiered (optional)
 
-    lambda_handler retrieves the object from Bolt and S3 (if BucketClean is OFF), computes and returns their
-    corresponding MD5 hash. If the object is gzip encoded, object is decompressed before computing its MD5.
+    In full mode, lambda_handler retrieves the object from Bolt and S3 (if BucketClean is OFF), computes and
+    returns their corresponding MD5 hash. If the object is gzip encoded, object is decompressed before
+    computing its MD5.
+
+    In tiered mode, lambda_handler first compares the metadata returned by a HEAD request to Bolt and S3:
+    ContentLength, then the stored checksums (x-amz-checksum-*) or, if neither object was uploaded in multiple
+    parts, the ETag. The object is retrieved from Bolt and S3 and its MD5s compared only when these checks
+    disagree or are unavailable (e.g a HEAD request fails). The tier that settled the validation (checksum, etag
+    or md5) is returned along with whether the objects match. If BucketClean is ON, only the MD5 of the object
+    in Bolt is computed (tier bolt_md5).
 
     :param event: incoming event data
     :param context: runtime information
-    :return: md5s of object retrieved from Bolt and S3
+    :return: md5s of object retrieved from Bolt and S3, or the validation result of each key
     """
     bucket = event['bucket']
-    key = event['key']
     if 'bucketClean' in event:
         bucket_clean = str(event['bucketClean']).upper()
     else:
         bucket_clean = 'OFF'
+    if 'validationMode' in event:
+        validation_mode = str(event['validationMode']).upper()
+    else:
+        validation_mode = 'FULL'
+    if validation_mode not in ('FULL', 'TIERED'):
+        return {
+            'errorMessage': "unsupported validationMode: {}".format(event['validationMode']),
+            'errorCode': str(1)
+        }
 
     s3_client = boto3.client('s3')
     bolts3_client = bolt3.client('s3')
 
+    if 'keys' in event:
+        return {
+            'results': {key: _validate(s3_client, bolts3_client, bucket, key, bucket_clean, validation_mode)
+                        for key in event['keys']}
+        }
+    return _validate(s3_client, bolts3_client, bucket, event['key'], bucket_clean, validation_mode)
+
+
+def _validate(s3_client, bolts3_client, bucket, key, bucket_clean, validation_mode):
+    """
+    Validates an object of Bolt against S3.
+    :param s3_client: S3 client
+    :param bolts3_client: Bolt client
+    :param bucket: bucket name
+    :param key: key name
+    :param bucket_clean: ON if the object is not retained in S3
+    :param validation_mode: FULL or TIERED
+    :return: md5s of object retrieved from Bolt and S3, or the tiered validation result
+    """
     try:
-        # Get Object from Bolt
+        # without a copy of the object in S3, only the MD5 of the object in Bolt can be computed.
+        if bucket_clean != 'OFF':
+            bolt_resp = bolts3_client.get_object(Bucket=bucket, Key=key)
+            bolt_md5 = _md5(bolt_resp, _is_gzip(bolt_resp, key))
+            if validation_mode == 'TIERED':
+                return {
+                    'tier': 'bolt_md5',
+                    'match': None,
+                    'bolt-md5': bolt_md5
+                }
+            return {
+                'bolt-md5': bolt_md5
+            }
+
+        metadata_error = None
+        if validation_mode == 'TIERED':
+            # HEAD Object from Bolt and S3, along with their stored checksums. If either HEAD fails
+            # (e.g ChecksumMode unsupported, access denied, throttled), fall back to comparing MD5s.
+            try:
+                bolt_head = bolts3_client.head_object(Bucket=bucket, Key=key, ChecksumMode='ENABLED')
+                s3_head = s3_client.head_object(Bucket=bucket, Key=key, ChecksumMode='ENABLED')
+                result = _compare_metadata(s3_head, bolt_head)
+                if result is not None:
+                    return result
+            except ClientError as e:
+                metadata_error = e.response['Error']['Code']
+            except Exception as e:
+                metadata_error = str(e)
+
+        # Get Object from Bolt and S3
         bolt_resp = bolts3_client.get_object(Bucket=bucket, Key=key)
-        # Get Object from S3 if bucket clean is off
-        if bucket_clean == 'OFF':
-            s3_resp = s3_client.get_object(Bucket=bucket, Key=key)
+        s3_resp = s3_client.get_object(Bucket=bucket, Key=key)
 
         # Parse the MD5 of the returned object.
         # If Object is gzip encoded, compute MD5 on the decompressed object.
-        if ('ContentEncoding' in s3_resp and s3_resp['ContentEncoding'] == 'gzip') or str(key).endswith('.gz'):
-            bolt_md5 = hashlib.md5(gzip.decompress(bolt_resp['Body'].read())).hexdigest().upper()
-            s3_md5 = hashlib.md5(gzip.decompress(s3_resp['Body'].read())).hexdigest().upper()
-        else:
-            bolt_md5 = hashlib.md5(bolt_resp['Body'].read()).hexdigest().upper()
-            s3_md5 = hashlib.md5(s3_resp['Body'].read()).hexdigest().upper()
+        gzipped = _is_gzip(s3_resp, key)
+        s3_md5 = _md5(s3_resp, gzipped)
+        bolt_md5 = _md5(bolt_resp, gzipped)
+        if validation_mode == 'TIERED':
+            result = {
+                'tier': 'md5',
+                'match': s3_md5 == bolt_md5,
+                's3-md5': s3_md5,
+                'bolt-md5': bolt_md5
+            }
+            if metadata_error is not None:
+                result['metadata_error'] = metadata_error
+            return result
         return {
             's3-md5': s3_md5,
             'bolt-md5': bolt_md5
@@ -60,3 +138,85 @@ def lambda_handler(event, context):
             'errorMessage': str(e),
             'errorCode': str(1)
         }
+
+
+def _compare_metadata(s3_head, bolt_head):
+    """
+    Compares the metadata of an object returned by HEAD requests to Bolt and S3.
+    :param s3_head: HEAD Object response from S3
+    :param bolt_head: HEAD Object response from Bolt
+    :return: validation result if the metadata settles it, None if the objects must be compared by MD5
+    """
+    # objects of different length may still match once decompressed, which only the MD5s can tell.
+    if s3_head.get('ContentLength') != bolt_head.get('ContentLength'):
+        return None
+
+    for field in CHECKSUM_FIELDS:
+        if s3_head.get(field) and bolt_head.get(field):
+            if s3_head[field] != bolt_head[field]:
+                return None
+            return {
+                'tier': 'checksum',
+                'match': True,
+                'checksum': field,
+                's3-checksum': s3_head[field],
+                'bolt-checksum': bolt_head[field]
+            }
+
+    # the ETag of an object uploaded in multiple parts ('<md5>-<parts>') depends on the part sizes.
+    s3_etag = s3_head.get('ETag', '')
+    bolt_etag = bolt_head.get('ETag', '')
+    if s3_etag and bolt_etag and '-' not in s3_etag and '-' not in bolt_etag and s3_etag == bolt_etag:
+        return {
+            'tier': 'etag',
+            'match': True,
+            's3-etag': s3_etag,
+            'bolt-etag': bolt_etag
+        }
+    return None
+
+
+def _is_gzip(resp, key):
+    return resp.get('ContentEncoding') == 'gzip' or str(key).endswith('.gz')
+
+
+def _md5(resp, gzipped):
+    """
+    Computes the MD5 of the body of an object, reading it in chunks.
+    :param resp: Get Object response
+    :param gzipped: if True, the MD5 is computed on the decompressed object
+    :return: MD5 of the object
+    """
+    md5 = hashlib.md5()
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # True while a gzip member has been partially decompressed.
+    in_member = False
+    # True once a gzip member has been fully decompressed.
+    member_ended = False
+    body = resp['Body']
+    while True:
+        chunk = body.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        if not gzipped:
+            md5.update(chunk)
+            continue
+        # a gzip file may hold several members, each decompressed separately.
+        while chunk:
+            # like gzip.decompress, skip zero padding between (and after) members.
+            if member_ended and not in_member:
+                chunk = chunk.lstrip(b'\x00')
+                if not chunk:
+                    break
+            md5.update(decompressor.decompress(chunk))
+            if decompressor.eof:
+                chunk = decompressor.unused_data
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                in_member = False
+                member_ended = True
+            else:
+                chunk = b''
+                in_member = True
+    if in_member:
+        raise EOFError('Compressed file ended before the end-of-stream marker was reached')
+    return md5.hexdigest().upper()